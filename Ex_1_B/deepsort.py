@@ -1,8 +1,88 @@
-def deep_sorted(x: any) -> str:
+import ast
+import json
+import os
+import random
+import sys
+import tracemalloc
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from itertools import islice
+from time import perf_counter
+from typing import IO, Callable, Iterable, Iterator, Optional
+
+from instrument import collect, instrumented, measure, worker
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class CanonicalCache:
+    """
+    LRU cache of the canonical strings of containers, keyed on object identity.
+
+    Pass the same cache to several deep_sorted calls to share it across calls. The cache keeps
+    a reference to every cached container so its id cannot be reused by another object, which also
+    means cached containers must not be mutated (call clear() after mutating them).
+
+    >>> shared = {"b": [3, 2, 1], "a": 0}
+    >>> cache = CanonicalCache(maxsize=100)
+    >>> deep_sorted([shared] * 1000, cache=cache)[:23]
+    '[{"a":0, "b":[1, 2, 3]}'
+    >>> cache.info()
+    CacheInfo(hits=999, misses=3, maxsize=100, currsize=3)
+
+    >>> deep_sorted([shared, shared], cache=cache)
+    '[{"a":0, "b":[1, 2, 3]}, {"a":0, "b":[1, 2, 3]}]'
+    >>> cache.info()
+    CacheInfo(hits=1001, misses=4, maxsize=100, currsize=4)
+
+    >>> small = CanonicalCache(maxsize=1)
+    >>> deep_sorted([[2, 1], [4, 3]], cache=small)
+    '[[1, 2], [3, 4]]'
+    >>> small.info()
+    CacheInfo(hits=0, misses=3, maxsize=1, currsize=1)
+    """
+
+    def __init__(self, maxsize: Optional[int] = 4096):
+        """
+        :param maxsize: The maximal number of cached containers, or None for an unbounded cache.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # id(container) -> (container, canonical string)
+
+    def get(self, x: any) -> Optional[str]:
+        entry = self._entries.get(id(x))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(id(x))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, x: any, canonical: str) -> None:
+        self._entries[id(x)] = (x, canonical)
+        self._entries.move_to_end(id(x))
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            # Evict the least recently used container
+            self._entries.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+@instrumented()
+def deep_sorted(x: any, cache: Optional[CanonicalCache] = None) -> str:
     """
-    Sorts a nested structure (dict, list, set, tuple) recursively and returns a string representation.
+    Sorts a nested structure (dict, list, set, tuple) at every level and returns a string representation.
 
     :param x: The input nested structure.
+    :param cache: An optional CanonicalCache, so repeated sub-objects are sorted only once.
     :return: A string representation of the sorted nested structure.
 
     >>> deep_sorted({'b': 2, 'a': 1})
@@ -67,22 +147,351 @@ def deep_sorted(x: any) -> str:
     >>> x = {"a": (1, [3, 2], {"b": [5, 4, {"d": (7, 8), "c": 6}]}), "e": [10, 9]}
     >>> deep_sorted(x)
     '{"a":(1, [2, 3], {"b":[4, 5, {"c":6, "d":(7, 8)}]}), "e":[10, 9]}'
+
+    >>> deep = []
+    >>> for _ in range(5000): deep = [deep, 0]
+    >>> deep_sorted(deep)[:12]
+    '[0, [0, [0, '
+
+    >>> x = [1]
+    >>> x.append({'a': x})
+    >>> deep_sorted(x)
+    Traceback (most recent call last):
+    ValueError: The structure contains itself, so it has no canonical form.
     """
 
-    if isinstance(x, dict):
-        sorted_items = sorted((str(k), deep_sorted(v)) for k, v in x.items())
-        result = "{" + ", ".join(f'"{k}":{v}' for k, v in sorted_items) + "}"
-    elif isinstance(x, (list, set, tuple)):
-        start = "[" if isinstance(x, list) else "{" if isinstance(x, set) else "("
-        end = "]" if isinstance(x, list) else "}" if isinstance(x, set) else ")"
-        sorted_values = sorted((deep_sorted(v) for v in x))
-        # print(f"sorted_values = {sorted_values}")
-        result = start + ", ".join(sorted_values) + end
-    else:
-        result = str(x)
+    if not _is_container(x):
+        return str(x)
+    if cache is not None:
+        cached = cache.get(x)
+        if cached is not None:
+            return cached
+    result = _render(x, _fold_children(x, str, _render, cache))
+    if cache is not None:
+        cache.put(x, result)
     return result
 
 
+def write_deep_sorted(x: any, file: IO[str], cache: Optional[CanonicalCache] = None) -> None:
+    """
+    Writes the same string as deep_sorted(x) to a text file-like object.
+
+    The top-level container is written item by item, so the full string is never built in memory.
+
+    :param x: The input nested structure.
+    :param file: A writable text stream.
+    :param cache: An optional CanonicalCache, as in deep_sorted.
+
+    >>> import io
+    >>> buffer = io.StringIO()
+    >>> write_deep_sorted({"b": [2, 1], "a": (4, 3)}, buffer)
+    >>> buffer.getvalue()
+    '{"a":(3, 4), "b":[1, 2]}'
+
+    >>> buffer = io.StringIO()
+    >>> write_deep_sorted("Hello", buffer)
+    >>> buffer.getvalue()
+    'Hello'
+    """
+
+    if not _is_container(x):
+        file.write(str(x))
+        return
+    cached = cache.get(x) if cache is not None else None
+    if cached is not None:
+        file.write(cached)
+        return
+    start, end = _brackets(x)
+    file.write(start)
+    for i, item in enumerate(_sorted_items(x, _fold_children(x, str, _render, cache))):
+        if i:
+            file.write(", ")
+        file.write(item)
+    file.write(end)
+
+
+def deep_hash(x: any) -> str:
+    """
+    Computes a stable fingerprint of a nested structure without building its deep_sorted string.
+
+    Two structures get the same fingerprint exactly when deep_sorted gives them the same string, except
+    for leaves whose own string contains the separators used by deep_sorted (such as '1, 2' vs 1 and 2).
+    Containers are combined bottom-up, and any container whose string would be long is replaced by a
+    fixed-size digest, so parents sort and join short tokens instead of the full strings of their children.
+
+    :param x: The input nested structure.
+    :return: A 32-character hexadecimal digest.
+
+    >>> deep_hash({"a": [1, 2], "b": (3, 4)}) == deep_hash({"b": (4, 3), "a": [2, 1]})
+    True
+
+    >>> deep_hash([1, 2]) == deep_hash((1, 2))
+    False
+
+    >>> len(deep_hash(42))
+    32
+
+    >>> deep_hash("\\0" + deep_hash([list(range(100))])) == deep_hash([list(range(100))]), len(deep_hash("\\0abc"))
+    (False, 32)
+    """
+
+    if _is_container(x):
+        token = _combine_digests(x, _fold_children(x, _hash_leaf, _combine_digests))
+        if token.startswith("\0"):
+            # Already a digest; the marker only keeps it apart from plain strings inside its parents
+            return token[1:]
+    else:
+        token = _hash_leaf(x)
+    return blake2b(token.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def deep_equal(x: any, y: any) -> bool:
+    """
+    Checks whether deep_sorted(x) == deep_sorted(y), using deep_hash.
+
+    >>> deep_equal([5, {'b': 4, 'a': 9}, (8, 9)], [(8, 9), {'a': 9, 'b': 4}, 5])
+    True
+
+    >>> deep_equal({"a": [3, 2, 1]}, {"a": [1, 2]})
+    False
+
+    >>> deep_equal([1, 2], ['2', '1'])
+    True
+
+    >>> deep_equal(set(), {})
+    True
+    """
+    return deep_hash(x) == deep_hash(y)
+
+
+def _combine_digests(x: any, parts: list) -> str:
+    token = _render(x, parts)
+    if len(token) <= _MAX_PLAIN_TOKEN and "\0" not in token:
+        # A short container whose children are all plain is its own deep_sorted string
+        return token
+    # The leading NUL keeps digests apart from plain strings
+    return "\0" + blake2b(token.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _hash_leaf(x: any) -> str:
+    token = str(x)
+    if "\0" in token:
+        # A leaf could spell out a digest with its marker: digest it too, apart from the containers
+        return "\0" + blake2b(token.encode("utf-8", "surrogatepass"), digest_size=16, person=b"leaf").hexdigest()
+    return token
+
+
+def compare_deep_hash_with_deep_sorted(sizes=(1000, 10000, 50000), repeat: int = 3):
+    """
+    Compares deep_equal(x, y) with deep_sorted(x) == deep_sorted(y) on random inputs of different sizes,
+    both a flat list of small records and a chain of records nested `size` levels deep.
+
+    Prints the best time of `repeat` runs and the peak memory (measured in a separate, traced run).
+
+    >>> compare_deep_hash_with_deep_sorted(sizes=(10,), repeat=1)  # doctest: +ELLIPSIS
+    shape   size      method         time (s)   peak memory (KB)
+    flat    10        deep_sorted    ...
+    flat    10        deep_equal     ...
+    deep    10        deep_sorted    ...
+    deep    10        deep_equal     ...
+    """
+
+    def random_record(rng):
+        return {"id": rng.randrange(10 ** 6), "tags": {rng.choice("abcdef") for _ in range(4)},
+                "points": [(rng.randrange(100), rng.randrange(100)) for _ in range(3)],
+                "name": "x" * rng.randrange(30)}
+
+    def flat(rng, size):
+        return [random_record(rng) for _ in range(size)]
+
+    def deep(rng, size):
+        x = []
+        for _ in range(size):
+            x = [x, random_record(rng)]
+        return x
+
+    print(f"{'shape':<8}{'size':<10}{'method':<15}{'time (s)':<11}peak memory (KB)")
+    for shape in (flat, deep):
+        for size in sizes:
+            x = shape(random.Random(size), size)
+            y = shape(random.Random(size), size)
+            for name, func in (("deep_sorted", lambda: deep_sorted(x) == deep_sorted(y)),
+                               ("deep_equal", lambda: deep_equal(x, y))):
+                seconds = min(measure(func)[1] for _ in range(repeat))
+                tracemalloc.start()
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{shape.__name__:<8}{size:<10}{name:<15}{seconds:<11.4f}{peak / 1024:.0f}")
+
+
+# Containers with deep_sorted strings up to this length are used as-is by deep_hash instead of being digested
+_MAX_PLAIN_TOKEN = 64
+
+
+def _is_container(x: any) -> bool:
+    return isinstance(x, (dict, list, set, tuple))
+
+
+def _brackets(x: any) -> tuple:
+    if isinstance(x, list):
+        return "[", "]"
+    if isinstance(x, (dict, set)):
+        return "{", "}"
+    return "(", ")"
+
+
+def _iter_children(x: any):
+    return iter(x.items()) if isinstance(x, dict) else iter(x)
+
+
+def _sorted_items(x: any, parts: list):
+    """
+    Sorts the canonical children of x and returns them formatted as they appear between the brackets.
+    """
+    parts.sort()
+    if isinstance(x, dict):
+        return (f'"{k}":{v}' for k, v in parts)
+    return parts
+
+
+def _render(x: any, parts: list) -> str:
+    start, end = _brackets(x)
+    return start + ", ".join(_sorted_items(x, parts)) + end
+
+
+def _fold_children(root: any, leaf: Callable, combine: Callable, cache: Optional[CanonicalCache] = None) -> list:
+    """
+    Computes the canonical forms of the children of the container root bottom-up, with an explicit work stack
+    instead of recursion. Containers found in the cache are not descended into, and every combined container
+    is added to it.
+
+    :param leaf: Returns the canonical form of a non-container.
+    :param combine: Returns the canonical form of a container, given the canonical forms of its children.
+    :return: The unsorted canonical forms of the children of root ((str(key), value) pairs if root is a dict).
+    :raises ValueError: If a container contains itself, directly or through its children.
+    """
+
+    # Each frame is [container, iterator over its children, canonical children so far, key of the open child]
+    stack = [[root, _iter_children(root), [], None]]
+    open_ids = {id(root)}  # The containers on the stack: meeting one again means the structure is cyclic
+    while True:
+        frame = stack[-1]
+        node, children, parts = frame[0], frame[1], frame[2]
+        for child in children:
+            key = None
+            if isinstance(node, dict):
+                key, child = str(child[0]), child[1]
+            if _is_container(child):
+                cached = cache.get(child) if cache is not None else None
+                if cached is not None:
+                    parts.append(cached if key is None else (key, cached))
+                    continue
+                if id(child) in open_ids:
+                    raise ValueError("The structure contains itself, so it has no canonical form.")
+                # Descend into the child; this frame resumes from its iterator once the child is done
+                open_ids.add(id(child))
+                frame[3] = key
+                stack.append([child, _iter_children(child), [], None])
+                break
+            token = leaf(child)
+            parts.append(token if key is None else (key, token))
+        else:
+            # All children of node are canonical: combine them and hand the result to its parent
+            stack.pop()
+            if not stack:
+                return parts
+            open_ids.discard(id(node))
+            result = combine(node, parts)
+            if cache is not None:
+                cache.put(node, result)
+            parent = stack[-1]
+            parent[2].append(result if parent[3] is None else (parent[3], result))
+
+
+def parse_record(line: str, json_format: bool = False) -> any:
+    """
+    Safely parses one input record, either a Python literal or a JSON value.
+
+    >>> parse_record("(3, {1, 2}, {'a': [None]})")
+    (3, {1, 2}, {'a': [None]})
+
+    >>> parse_record('{"a": [1, 2.5, true, null]}', json_format=True)
+    {'a': [1, 2.5, True, None]}
+
+    >>> parse_record("__import__('os')")  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ValueError: malformed node or string on line 1: <ast.Call object at ...>
+    """
+    return json.loads(line) if json_format else ast.literal_eval(line)
+
+
+def canonicalize_stream(lines: Iterable[str], json_format: bool = False, workers: Optional[int] = None,
+                        chunksize: int = 1000) -> Iterator[str]:
+    """
+    Canonicalizes a stream of records, one record per line, with deep_sorted.
+
+    Chunks of lines are parsed and sorted in a process pool. At most a few chunks per worker are in flight,
+    so the input is read lazily, and the results are yielded in input order. Blank lines are skipped.
+
+    :param lines: The input lines.
+    :param json_format: True if the records are JSON values, False if they are Python literals.
+    :param workers: The number of worker processes (default: the number of CPUs); 1 sorts in this process.
+    :param chunksize: The number of records sent to a worker at once.
+    :return: Generator of canonical strings, one per record.
+
+    >>> list(canonicalize_stream(['[3, 1, 2]', '', '{"b": 1, "a": (2, 1)}'], workers=1))
+    ['[1, 2, 3]', '{"a":(1, 2), "b":1}']
+
+    >>> list(canonicalize_stream(['[%d, 0]' % i for i in range(10, 0, -1)], workers=2, chunksize=3))[:3]
+    ['[0, 10]', '[0, 9]', '[0, 8]']
+    """
+
+    chunks = _chunks((line for line in lines if line.strip()), chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _canonicalize_chunk(chunk, json_format)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    task = worker(_canonicalize_chunk)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(task, chunk, json_format))
+            # Bound the number of chunks in flight so a huge input is not read into memory at once
+            if len(pending) >= 2 * workers:
+                yield from collect(pending.popleft().result())
+        while pending:
+            yield from collect(pending.popleft().result())
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _canonicalize_chunk(lines: list, json_format: bool) -> list:
+    return [deep_sorted(parse_record(line, json_format)) for line in lines]
+
+
 if __name__ == '__main__':
-    x = eval(input())
-    print(deep_sorted(x))
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the deep_sorted form of every record (one per line).")
+    parser.add_argument("file", nargs="?", help="input file, one record per line (default: stdin)")
+    parser.add_argument("--json", action="store_true", help="records are JSON values instead of Python literals")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: #CPUs)")
+    parser.add_argument("--chunksize", type=int, default=1000, help="records sent to a worker at once")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    count = 0
+    with open(args.file, encoding="utf-8") if args.file else sys.stdin as lines:
+        for canonical in canonicalize_stream(lines, args.json, args.workers, args.chunksize):
+            sys.stdout.write(canonical + "\n")
+            count += 1
+    end = perf_counter()
+    print(f"{count} records in {end - start:.3f} sec ({count / max(end - start, 1e-9):.0f} records/sec)",
+          file=sys.stderr)
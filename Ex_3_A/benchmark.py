@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# The fields of a result row, in the order they are written to CSV
+FIELDS = ('group', 'engine', 'size', 'repeat', 'median', 'q1', 'q3', 'iqr', 'min')
+
+
+def time_repeated(func: Callable, *args, repeat: int = 5, warmup: int = 1, **kwargs) -> List[float]:
+    """
+    Time a function several times, after some untimed warmup calls.
+
+    :param func: The function to time.
+    :param repeat: The number of timed calls.
+    :param warmup: The number of calls made before timing, to fill caches and load lazy imports.
+    :return: The running time of every timed call, in seconds.
+
+    >>> times = time_repeated(sum, [1, 2, 3], repeat=4)
+    >>> len(times), all(t >= 0 for t in times)
+    (4, True)
+    """
+    for _ in range(warmup):
+        func(*args, **kwargs)
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func(*args, **kwargs)
+        times.append(perf_counter() - start)
+    return times
+
+
+def summarize(times: Iterable[float]) -> Dict[str, float]:
+    """
+    Summarize running times by their median and interquartile range, which ignore the occasional outlier.
+
+    >>> summarize([1, 2, 3, 4, 100])
+    {'median': 3.0, 'q1': 2.0, 'q3': 4.0, 'iqr': 2.0, 'min': 1.0}
+    """
+    times = np.asarray(list(times), dtype=float)
+    q1, median, q3 = np.percentile(times, [25, 50, 75])
+    return {'median': float(median), 'q1': float(q1), 'q3': float(q3), 'iqr': float(q3 - q1),
+            'min': float(times.min())}
+
+
+def run_benchmark(engines: Dict[str, Callable], sizes: Iterable[int], make_input: Callable, group: str = '',
+                  repeat: int = 5, warmup: int = 1, seed: int = 0) -> List[dict]:
+    """
+    Time every engine on inputs of every size.
+
+    :param engines: The functions to compare, by name. All of them get the same input.
+    :param sizes: The input sizes.
+    :param make_input: Called as make_input(size, rng), returns the tuple of arguments of the engines.
+    :param group: A label for this benchmark (for example the kind of input), kept in the rows.
+    :param repeat: The number of timed calls per engine and size.
+    :param warmup: The number of untimed calls before them.
+    :param seed: The seed of the numpy RandomState passed to make_input, so every run times the same inputs.
+    :return: One row per engine and size, with the fields in FIELDS.
+
+    >>> rows = run_benchmark({'sum': sum, 'sorted': sorted}, [10, 100], lambda size, rng: (rng.rand(size),), repeat=3)
+    >>> [(row['engine'], row['size'], row['repeat']) for row in rows]
+    [('sum', 10, 3), ('sorted', 10, 3), ('sum', 100, 3), ('sorted', 100, 3)]
+    """
+    rng = np.random.RandomState(seed)
+    rows = []
+    for size in sizes:
+        args = make_input(size, rng)
+        for name, engine in engines.items():
+            times = time_repeated(engine, *args, repeat=repeat, warmup=warmup)
+            rows.append({'group': group, 'engine': name, 'size': size, 'repeat': repeat, **summarize(times)})
+    return rows
+
+
+def save_results(rows: List[dict], path: str):
+    """
+    Save result rows to a .csv or a .json file, by the extension of the path.
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w') as file:
+            json.dump(rows, file, indent=1)
+
+
+def load_results(path: str) -> List[dict]:
+    """
+    Load result rows saved by save_results.
+
+    >>> import tempfile
+    >>> rows = [{'group': 'g', 'engine': 'e', 'size': 5, 'repeat': 3, **summarize([1, 2, 3])}]
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     for name in ('results.csv', 'results.json'):
+    ...         save_results(rows, os.path.join(directory, name))
+    ...         print(load_results(os.path.join(directory, name)) == rows)
+    True
+    True
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, newline='') as file:
+            return [{**row, 'size': int(row['size']), 'repeat': int(row['repeat']),
+                     **{field: float(row[field]) for field in FIELDS[4:]}} for row in csv.DictReader(file)]
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(rows: List[dict], baseline: List[dict], tolerance: float = 0.5,
+                     min_time: float = 1e-4) -> List[dict]:
+    """
+    Compare results with a baseline run, and return the ones that got slower.
+
+    A result is a regression when its median is more than `tolerance` (a fraction) above the baseline median
+    and more than `min_time` seconds above it, and its first quartile is above the baseline's third quartile,
+    so a few slow runs, and differences below the timer resolution, are not flagged. On a noisy machine,
+    raise the repeat count of both runs. Results missing from the baseline are skipped.
+
+    :return: The regressed rows, with the baseline median and the slowdown ratio added.
+
+    >>> base = [{'group': '', 'engine': 'e', 'size': 1, 'median': 0.010, 'q3': 0.011}]
+    >>> slower = {'group': '', 'engine': 'e', 'size': 1, 'median': 0.020, 'q1': 0.019}
+    >>> [row['ratio'] for row in find_regressions([slower], base)]
+    [2.0]
+    >>> find_regressions([{**slower, 'q1': 0.009}], base)
+    []
+    """
+    previous = {(row['group'], row['engine'], row['size']): row for row in baseline}
+    regressions = []
+    for row in rows:
+        base = previous.get((row['group'], row['engine'], row['size']))
+        if base is None:
+            continue
+        difference = row['median'] - base['median']
+        if difference > max(tolerance * base['median'], min_time) and row['q1'] > base['q3']:
+            regressions.append({**row, 'baseline': base['median'], 'ratio': row['median'] / base['median']})
+    return regressions
+
+
+def report_regressions(regressions: List[dict]):
+    """
+    Print the regressions found by find_regressions as a table.
+
+    >>> report_regressions([])
+    no regressions
+    >>> report_regressions([{'group': 'g', 'engine': 'e', 'size': 5, 'median': 0.02, 'baseline': 0.01, 'ratio': 2.0}])
+    group     engine                                  size    baseline (s)  median (s)  ratio
+    g         e                                       5       0.010000      0.020000    2.00
+    """
+    if not regressions:
+        print("no regressions")
+        return
+    print(f"{'group':<10}{'engine':<40}{'size':<8}{'baseline (s)':<14}{'median (s)':<12}ratio")
+    for row in regressions:
+        print(f"{row['group']:<10}{row['engine']:<40}{row['size']:<8}{row['baseline']:<14.6f}{row['median']:<12.6f}"
+              f"{row['ratio']:.2f}")
+
+
+def plot_results(rows: List[dict], path: Optional[str] = None, show: bool = False):
+    """
+    Plot the median running time of every engine against the size, with the IQR as a band, one chart per group.
+
+    The figure is drawn without pyplot, so no display is needed, unless show is True.
+
+    :param path: The file to save the figure to, or None.
+    :param show: Whether to also show it on the screen.
+    """
+    groups = list(dict.fromkeys(row['group'] for row in rows))
+    if show:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=(5 * len(groups), 4))
+    else:
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=(5 * len(groups), 4))
+    axes = figure.subplots(1, len(groups), squeeze=False)[0]
+
+    for axis, group in zip(axes, groups):
+        group_rows = [row for row in rows if row['group'] == group]
+        for engine in dict.fromkeys(row['engine'] for row in group_rows):
+            engine_rows = [row for row in group_rows if row['engine'] == engine]
+            sizes = [row['size'] for row in engine_rows]
+            axis.plot(sizes, [row['median'] for row in engine_rows], label=engine)
+            axis.fill_between(sizes, [row['q1'] for row in engine_rows], [row['q3'] for row in engine_rows],
+                              alpha=0.3)
+        axis.set_xlabel('Input Size')
+        axis.set_ylabel(f"Median Running Time (s), {group_rows[0]['repeat']} runs")
+        axis.set_yscale('log')
+        if group:
+            axis.set_title(group)
+    axes[0].legend()
+    figure.tight_layout()
+    if path is not None:
+        figure.savefig(path)
+    if show:
+        import matplotlib.pyplot as plt
+        plt.show()
@@ -1,17 +1,29 @@
+import argparse
+import os
+import sys
 import numpy as np
 import scipy as sc
 from numpy.linalg import solve
 from time import perf_counter
-import matplotlib.pyplot as plt
 
+from instrument import measure
+from benchmark import find_regressions, load_results, plot_results, report_regressions, run_benchmark, save_results
+from iterative import METHODS, PRECONDITIONERS, load_matrix, random_sparse_system, save_matrix, solve_iterative
+from solvers import FactorizationCache, solve_linear
 
-def solve_with_root(a: np.ndarray, b: np.ndarray):
+
+def solve_with_root(a: np.ndarray, b: np.ndarray, jacobian: bool = True):
     """
         Solves a system of linear equations using scipy.optimize.root.
 
+        The Jacobian of a @ x - b is a itself, so it is given to the root finder, which otherwise estimates it
+        by finite differences at the cost of n extra evaluations per iteration.
+        A sparse a is solved by the Newton-Krylov method of root, which needs no dense Jacobian.
+
         Parameters:
-            a (np.ndarray): Coefficient matrix.
+            a (np.ndarray): Coefficient matrix, dense or scipy.sparse.
             b (np.ndarray): Constant vector.
+            jacobian (bool): Whether to pass the exact Jacobian (True), or let root estimate it.
 
         Returns:
             np.ndarray: Solution vector x such that a @ x = b.
@@ -27,7 +39,12 @@ def solve_with_root(a: np.ndarray, b: np.ndarray):
     def equations(x):
         return a @ x - b
 
-    solution = sc.optimize.root(equations, np.zeros(a.shape[1]))
+    def jacobian_matrix(x):
+        return a
+
+    if sc.sparse.issparse(a):
+        return sc.optimize.root(equations, np.zeros(a.shape[1]), method='krylov').x
+    solution = sc.optimize.root(equations, np.zeros(a.shape[1]), jac=jacobian_matrix if jacobian else None)
     return solution.x
 
 
@@ -66,6 +83,7 @@ def test_solve_with_root():
 def measure_time(func, *args, **kwargs):
     """
         Measure the time it takes to execute a function.
+        To keep the result of the function too, use instrument.measure, which returns both.
 
         Parameters:
             func (callable): The function to measure.
@@ -82,52 +100,222 @@ def measure_time(func, *args, **kwargs):
         True
         """
 
-    start = perf_counter()
-    result = func(*args, **kwargs)
-    end = perf_counter()
-    return end - start
+    return measure(func, *args, **kwargs)[1]
+
+
+def random_system(size: int, structure: str = 'general', rng=np.random):
+    """
+        Generate a random system of linear equations with the given structure.
 
+        Parameters:
+            size (int): The number of equations and unknowns.
+            structure (str): 'general', 'spd' (symmetric positive definite), 'upper' (triangular)
+                             or 'banded' (tridiagonal).
+            rng: The random generator, with a randint method.
 
-def compare_solution_methods():
+        Returns:
+            tuple: The coefficient matrix and the constant vector.
+
+        Example:
+        >>> a, b = random_system(5, 'upper')
+        >>> bool(np.all(np.tril(a, -1) == 0)), b.shape
+        (True, (5,))
+        """
+    a = rng.randint(-1000, 1000, size=(size, size))
+    b = rng.randint(-1000, 1000, size=size)
+    if structure == 'spd':
+        a = a @ a.T + size * np.eye(size, dtype=a.dtype)
+    elif structure == 'upper':
+        # A dominant diagonal keeps the triangular system well conditioned
+        a = np.triu(a) + 2000 * size * np.eye(size, dtype=a.dtype)
+    elif structure == 'banded':
+        a = np.triu(np.tril(a, 1), -1) + 3000 * np.eye(size, dtype=a.dtype)
+    return a, b
+
+
+def compare_solution_methods(sizes=range(1, 301, 5), structures=('general', 'spd', 'upper', 'banded'),
+                             repeat: int = 5, warmup: int = 1, seed: int = 0, output: str = None,
+                             plot: str = "comparison.png", show: bool = False, baseline: str = None):
     """
-        Compare the performance of solve_with_root and numpy.linalg.solve on random inputs of different sizes.
+        Compare the performance of the solution engines on random inputs of different sizes and structures.
+
+        For every structure, generates random systems of every size, and times solve_with_root with and without
+        the exact Jacobian, numpy.linalg.solve, and solve_linear (which dispatches on the structure), with the
+        harness of benchmark.py: `repeat` timed runs after `warmup` untimed ones, summarized by the median and IQR.
+        The inputs come from a RandomState seeded with `seed`, so every run times the same systems.
 
-        Generates random coefficient matrices and constant vectors of sizes between 1 and 1000,
-        measures the execution time for both solve_with_root and numpy.linalg.solve, and plots the results.
+        Parameters:
+            output (str): A .csv or .json file to save the results to, or None.
+            plot (str): The file to save the plot to (drawn headless), or None.
+            show (bool): Whether to also show the plot on the screen.
+            baseline (str): Results saved by an earlier run. The engines that got slower are printed.
+
+        Returns:
+            list: The result rows, and the regressions against the baseline (empty without one).
 
-        The function generates a plot saved as 'comparison.png' and also displays it.
+        Example:
+        >>> rows, regressions = compare_solution_methods(sizes=[5, 10], repeat=3, plot=None)
+        >>> len(rows), sorted(rows[0])
+        (32, ['engine', 'group', 'iqr', 'median', 'min', 'q1', 'q3', 'repeat', 'size'])
+        """
+    engines = {
+        'solve_with_root (finite differences)': lambda a, b: solve_with_root(a, b, jacobian=False),
+        'solve_with_root (Jacobian)': solve_with_root,
+        'numpy.linalg.solve': solve,
+        'solve_linear': solve_linear,
+    }
+    rows = []
+    for structure in structures:
+        rows.extend(run_benchmark(engines, sizes, lambda size, rng: random_system(size, structure, rng),
+                                  group=structure, repeat=repeat, warmup=warmup, seed=seed))
+
+    if output is not None:
+        save_results(rows, output)
+    if plot is not None or show:
+        plot_results(rows, plot, show)
+    regressions = []
+    if baseline is not None:
+        regressions = find_regressions(rows, load_results(baseline))
+        report_regressions(regressions)
+    return rows, regressions
+
+
+def compare_batched_solves(count: int = 10000, size: int = 10):
+    """
+        Compare solving many small systems one by one with numpy.linalg.solve, and as one stack with solve_linear.
 
         Example:
-        >>> compare_solution_methods()  # This will generate and show a plot
+        >>> compare_batched_solves(100, 3)  # doctest: +ELLIPSIS
+        loop: ... s, batched: ... s
         """
-    sizes = list(range(1, 301))
-    root_times = []
-    numpy_times = []
+    rng = np.random.default_rng(0)
+    a = rng.integers(-1000, 1000, size=(count, size, size)).astype(float)
+    b = rng.integers(-1000, 1000, size=(count, size)).astype(float)
+    loop = measure_time(lambda: [solve(a[i], b[i]) for i in range(count)])
+    batched = measure_time(solve_linear, a, b)
+    print(f"loop: {loop:.4f} s, batched: {batched:.4f} s")
 
+
+def compare_repeated_solves(sizes=(100, 300, 1000), count: int = 20, repeat: int = 3):
+    """
+        Compare solving one matrix against many right-hand sides, arriving one at a time, with and without
+        a FactorizationCache.
+
+        Parameters:
+            sizes: The matrix sizes.
+            count (int): The number of right-hand sides solved against every matrix.
+            repeat (int): The number of timed runs, each with a new cache.
+
+        Returns:
+            list: The benchmark rows, with the median time to solve all the right-hand sides.
+
+        Example:
+        >>> rows = compare_repeated_solves(sizes=[10], count=3, repeat=1)  # doctest: +ELLIPSIS
+        size    numpy.linalg.solve  solve_linear  cache (fingerprint)  cache (key)
+        10      ...
+        """
+    def with_cache(use_key):
+        def solve_all(a, rhs):
+            cache = FactorizationCache()
+            return [cache.solve(a, b, key='a' if use_key else None) for b in rhs]
+        return solve_all
+
+    engines = {
+        'numpy.linalg.solve': lambda a, rhs: [solve(a, b) for b in rhs],
+        'solve_linear': lambda a, rhs: [solve_linear(a, b) for b in rhs],
+        'cache (fingerprint)': with_cache(False),
+        'cache (key)': with_cache(True),
+    }
+
+    def make_input(size, rng):
+        a, _ = random_system(size, 'general', rng)
+        return a.astype(float), rng.randint(-1000, 1000, size=(count, size)).astype(float)
+
+    rows = run_benchmark(engines, sizes, make_input, repeat=repeat)
+    print(f"{'size':<8}" + "".join(f"{name:<{len(name) + 2}}" for name in engines).rstrip())
     for size in sizes:
-        # Generate random coefficient matrix and constant vector
-        a = np.random.randint(-1000, 1000, size=(size, size))
-        b = np.random.randint(-1000, 1000, size=size)
+        times = [row['median'] for row in rows if row['size'] == size]
+        print(f"{size:<8}" + "".join(f"{t:<{len(name) + 2}.4f}" for name, t in zip(engines, times)).rstrip())
+    return rows
 
-        # Measure time for solve_with_root
-        root_times.append(measure_time(solve_with_root, a, b))
-        numpy_times.append(measure_time(solve, a, b))
 
-    # Plot the results
-    plt.plot(sizes, root_times, label='solve_with_root')
-    plt.plot(sizes, numpy_times, label='numpy.linalg.solve')
-    plt.xlabel('Input Size')
-    plt.ylabel('Average Running Time (s)')
-    plt.title('Performance Comparison')
-    plt.legend()
-    plt.savefig("comparison.png")  # after you plot the graphs, save them to a file and upload it separately.
-    plt.show()  # this should show the plot on your screen
+def compare_iterative_solvers(sizes=(10 ** 5, 10 ** 6), structures=('spd', 'general'), direct_limit: int = 10 ** 5,
+                              maxiter: int = 1000, seed: int = 0):
+    """
+        Compare the iterative solvers, with every preconditioner, on large random sparse systems.
+
+        Every system is written to a matrix file in a temporary directory and memory-mapped back, so the
+        solvers run on a matrix that is not held in memory twice. scipy's direct sparse solver is timed too
+        up to direct_limit unknowns; above that its fill-in makes it too slow and too large.
+
+        Parameters:
+            sizes: The numbers of unknowns.
+            structures: 'spd' and/or 'general', as in iterative.random_sparse_system.
+            direct_limit (int): The largest size solved with the direct solver.
+            maxiter (int): The iteration limit of every iterative solve.
+            seed (int): The seed of the random systems.
+
+        Returns:
+            list: The IterativeResult of every solve (without the solution vectors), with its size and structure.
+
+        Example:
+        >>> results = compare_iterative_solvers(sizes=[400], structures=['general'])  # doctest: +ELLIPSIS
+        size     structure method     preconditioner converged iterations  residual   time (s)
+        400      general   direct     -              True      -           ...
+        400      general   gmres      None           True      ...
+        >>> all(result['converged'] for result in results)
+        True
+        """
+    import tempfile
+    rng = np.random.RandomState(seed)
+    results = []
+    print(f"{'size':<9}{'structure':<10}{'method':<11}{'preconditioner':<15}{'converged':<10}{'iterations':<12}"
+          f"{'residual':<11}time (s)")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for structure in structures:
+                a, b = random_sparse_system(size, structure, rng)
+                path = os.path.join(directory, f'{structure}_{size}')
+                save_matrix(a, path)
+                del a
+                a = load_matrix(path)
+
+                if size <= direct_limit:
+                    start = perf_counter()
+                    x = sc.sparse.linalg.spsolve(a.tocsc(), b)
+                    seconds = perf_counter() - start
+                    residual = np.linalg.norm(b - a @ x) / np.linalg.norm(b)
+                    print(f"{size:<9}{structure:<10}{'direct':<11}{'-':<15}{'True':<10}{'-':<12}{residual:<11.1e}"
+                          f"{seconds:.3f}")
+                for method in METHODS:
+                    for preconditioner in PRECONDITIONERS:
+                        if method == 'cg' and (structure != 'spd' or preconditioner == 'ilu'):
+                            continue
+                        result = solve_iterative(a, b, method, preconditioner, maxiter=maxiter)
+                        results.append({'size': size, 'structure': structure,
+                                        **result._replace(x=None)._asdict()})
+                        print(f"{size:<9}{structure:<10}{method:<11}{str(preconditioner):<15}"
+                              f"{str(result.converged):<10}{result.iterations:<12}{result.residual:<11.1e}"
+                              f"{result.seconds:.3f}")
+                del a
+    return results
 
 
 if __name__ == '__main__':
     # put your code here
+    parser = argparse.ArgumentParser(description="Benchmark the linear system solvers.")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per engine and size")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed runs before them")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="save the results to this .csv or .json file")
+    parser.add_argument('--baseline', help="flag the regressions against results saved earlier")
+    parser.add_argument('--show', action='store_true', help="show the plot on the screen")
+    options = parser.parse_args()
+
     test_solve_with_root()
-    compare_solution_methods()
+    _, regressions = compare_solution_methods(repeat=options.repeat, warmup=options.warmup, seed=options.seed,
+                                              output=options.output, show=options.show, baseline=options.baseline)
+    sys.exit(1 if regressions else 0)
 
     # a = np.array([[1, 2], [3, 5]])
     # b = np.array([1, 2])
@@ -0,0 +1,190 @@
+"""
+Iterative solvers for large sparse systems, and an on-disk matrix format that is memory-mapped.
+
+A matrix file is a directory holding the CSR arrays of the matrix:
+
+    indptr.npy   - int64, the entries of row i are indices/data[indptr[i]:indptr[i + 1]]
+    indices.npy  - int32 column indices
+    data.npy     - float64 values
+    meta.json    - the format version and the shape
+"""
+
+import json
+import os
+from time import perf_counter
+from typing import NamedTuple, Optional
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import LinearOperator, bicgstab, cg, gmres, spilu
+
+FORMAT_VERSION = 1
+
+METHODS = ('cg', 'gmres', 'bicgstab')
+PRECONDITIONERS = (None, 'jacobi', 'ilu')
+
+
+class IterativeResult(NamedTuple):
+    """
+    The solution of an iterative solve, with how it got there.
+    """
+    x: np.ndarray
+    converged: bool
+    iterations: int
+    residual: float  # ||b - a @ x|| / ||b||
+    seconds: float  # Including the setup of the preconditioner
+    method: str
+    preconditioner: Optional[str]
+
+
+def solve_iterative(a, b, method: str = 'auto', preconditioner: Optional[str] = 'jacobi', tol: float = 1e-8,
+                    maxiter: Optional[int] = None, x0: Optional[np.ndarray] = None) -> IterativeResult:
+    """
+    Solve a sparse system a @ x = b with a Krylov method, which only needs products with a: its memory is
+    O(nonzeros + n), where a direct solver also stores the fill-in of the factors.
+
+    :param a: The coefficient matrix, sparse (converted to CSR) or dense.
+    :param b: The constant vector.
+    :param method: 'cg' (for symmetric positive definite matrices), 'gmres', 'bicgstab', or 'auto' for cg when
+                   a is symmetric with a positive diagonal and the preconditioner is symmetric, and bicgstab
+                   otherwise.
+    :param preconditioner: None, 'jacobi' (the inverse diagonal) or 'ilu' (an incomplete LU factorization, which
+                           costs a setup but usually saves many iterations). An incomplete LU factorization is not
+                           symmetric, so CG does not converge with it, and it is only used with gmres and bicgstab.
+    :param tol: The relative residual to reach.
+    :param maxiter: The maximum number of iterations, or None for the method's default.
+    :param x0: The initial guess, zeros by default.
+    :return: An IterativeResult. A solve that did not converge is returned, not raised: check result.converged.
+
+    >>> a = sparse.diags([-1., 4., -1.], [-1, 0, 1], shape=(5, 5), format='csr')
+    >>> result = solve_iterative(a, a @ np.ones(5))
+    >>> np.round(result.x, 6), result.converged, result.method
+    (array([1., 1., 1., 1., 1.]), True, 'cg')
+    >>> result = solve_iterative(a + sparse.eye(5, k=2), np.ones(5), preconditioner='ilu')
+    >>> result.method, result.converged, result.residual < 1e-8
+    ('bicgstab', True, True)
+    """
+    start = perf_counter()
+    a = sparse.csr_matrix(a)
+    b = np.asarray(b, dtype=float)
+    if method == 'auto':
+        method = 'cg' if preconditioner != 'ilu' and _symmetric_positive_diagonal(a) else 'bicgstab'
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}, expected 'auto' or one of {', '.join(METHODS)}.")
+    if method == 'cg' and preconditioner == 'ilu':
+        raise ValueError("CG needs a symmetric preconditioner: use 'jacobi', or gmres or bicgstab with 'ilu'.")
+
+    iterations = 0
+
+    def count(*_):
+        nonlocal iterations
+        iterations += 1
+
+    solver = {'cg': cg, 'gmres': gmres, 'bicgstab': bicgstab}[method]
+    options = {'callback_type': 'pr_norm'} if method == 'gmres' else {}
+    x, info = solver(a, b, x0=x0, rtol=tol, maxiter=maxiter, M=_preconditioner(a, preconditioner),
+                     callback=count, **options)
+    seconds = perf_counter() - start
+
+    norm = np.linalg.norm(b)
+    residual = float(np.linalg.norm(b - a @ x) / norm) if norm else float(np.linalg.norm(a @ x))
+    return IterativeResult(x, info == 0, iterations, residual, seconds, method, preconditioner)
+
+
+def _symmetric_positive_diagonal(a: sparse.csr_matrix) -> bool:
+    return bool(np.all(a.diagonal() > 0)) and (a != a.T).nnz == 0
+
+
+def _preconditioner(a: sparse.csr_matrix, preconditioner: Optional[str]) -> Optional[LinearOperator]:
+    """
+    An approximation of the inverse of a, as a LinearOperator for the M argument of the scipy solvers.
+    """
+    if preconditioner is None:
+        return None
+    if preconditioner == 'jacobi':
+        diagonal = a.diagonal()
+        inverse = np.divide(1.0, diagonal, out=np.ones_like(diagonal), where=diagonal != 0)
+        return LinearOperator(a.shape, matvec=lambda x: inverse * x.ravel(), dtype=float)
+    if preconditioner == 'ilu':
+        factors = spilu(a.tocsc(), drop_tol=1e-4, fill_factor=5)
+        return LinearOperator(a.shape, matvec=factors.solve, dtype=float)
+    raise ValueError(f"Unknown preconditioner {preconditioner}, expected one of {PRECONDITIONERS}.")
+
+
+def save_matrix(a, path: str) -> None:
+    """
+    Write a sparse matrix to a matrix file.
+
+    >>> import tempfile
+    >>> a = sparse.random(6, 4, density=0.5, format='csr', random_state=0)
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     save_matrix(a, os.path.join(directory, 'a'))
+    ...     loaded = load_matrix(os.path.join(directory, 'a'))
+    ...     loaded.shape, (loaded != a).nnz
+    ((6, 4), 0)
+    """
+    a = sparse.csr_matrix(a)
+    a.sum_duplicates()
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'indptr.npy'), a.indptr.astype(np.int64))
+    np.save(os.path.join(path, 'indices.npy'), a.indices.astype(np.int32))
+    np.save(os.path.join(path, 'data.npy'), a.data.astype(np.float64))
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({'version': FORMAT_VERSION, 'shape': list(a.shape)}, file)
+
+
+def load_matrix(path: str) -> sparse.csr_matrix:
+    """
+    Memory-map a matrix file as a CSR matrix. Its data and indices are views of the mapped files, read from
+    disk as the solver touches them.
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported matrix file version {meta['version']}.")
+
+    def mapped(name):
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+    return sparse.csr_matrix((mapped('data'), mapped('indices'), mapped('indptr')), shape=tuple(meta['shape']),
+                             copy=False)
+
+
+def random_sparse_system(size: int, structure: str = 'spd', rng=np.random):
+    """
+    Generate a random sparse system with the pattern of a 5-point stencil on a grid about sqrt(size) wide,
+    the shape of a discretized 2D diffusion problem: every unknown is coupled to its 4 grid neighbors by
+    random weights, and the diagonal is 1% larger than the sum of the couplings of its row.
+
+    :param structure: 'spd' (symmetric positive definite, diffusion) or 'general' (nonsymmetric, diffusion with
+                      random convection).
+    :return: The CSR coefficient matrix and the constant vector.
+
+    >>> a, b = random_sparse_system(1000, rng=np.random.RandomState(0))
+    >>> a.shape, a.nnz, (a != a.T).nnz, b.shape
+    ((1000, 1000), 4872, 0, (1000,))
+    """
+    width = max(int(np.sqrt(size)), 1)
+    rows, columns = [], []
+    for offset in (1, width):
+        # Couple i and i + offset, except across the end of a grid row
+        sources = np.arange(size - offset)
+        if offset == 1:
+            sources = sources[(sources + 1) % width != 0]
+        rows.append(sources)
+        columns.append(sources + offset)
+    rows, columns = np.concatenate(rows), np.concatenate(columns)
+    weights = rng.uniform(0.5, 1.5, size=rows.size)
+    if structure == 'spd':
+        upper = lower = weights
+    elif structure == 'general':
+        convection = rng.uniform(-0.5, 0.5, size=rows.size)
+        upper, lower = weights + convection, weights - convection
+    else:
+        raise ValueError(f"Unknown structure {structure}, expected 'spd' or 'general'.")
+
+    a = sparse.csr_matrix((-np.concatenate((upper, lower)), (np.concatenate((rows, columns)),
+                                                              np.concatenate((columns, rows)))), shape=(size, size))
+    dominance = np.asarray(abs(a).sum(axis=1)).ravel()
+    a = (a + sparse.diags(1.01 * dominance + 1e-3)).tocsr()
+    return a, rng.uniform(-1000, 1000, size=size)
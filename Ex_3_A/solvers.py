@@ -0,0 +1,297 @@
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import scipy as sc
+from scipy.sparse import issparse
+from scipy.sparse.linalg import splu, spsolve
+
+STRUCTURES = ('general', 'spd', 'upper', 'lower', 'banded', 'sparse')
+
+
+def detect_structure(a) -> str:
+    """
+    Detect the structure of a coefficient matrix, to choose the factorization that solves it.
+
+    The checks cost O(n^2), against O(n^3) for a general solve. 'spd' means symmetric with a positive
+    diagonal; whether it is really positive definite is only known when the Cholesky factorization succeeds.
+
+    :return: 'sparse' for a scipy.sparse matrix, 'upper' or 'lower' for a triangular matrix, 'banded' when
+             the band (lower + upper bandwidth + 1) is at most a quarter of the size, 'spd', or 'general'.
+
+    >>> detect_structure(np.array([[2, 1], [0, 3]]))
+    'upper'
+    >>> detect_structure(np.array([[2, 0], [1, 3]]))
+    'lower'
+    >>> detect_structure(np.eye(12) * 2 + np.eye(12, k=1) + np.eye(12, k=-1))
+    'banded'
+    >>> detect_structure(np.array([[4, 1, 1], [1, 3, 0], [1, 0, 2]]))
+    'spd'
+    >>> detect_structure(np.array([[1, 2], [3, 5]]))
+    'general'
+    """
+    if issparse(a):
+        return 'sparse'
+    a = np.asarray(a)
+    n = a.shape[0]
+    if not np.any(np.tril(a, -1)):
+        return 'upper'
+    if not np.any(np.triu(a, 1)):
+        return 'lower'
+    lower, upper = _bandwidths(a)
+    if lower + upper + 1 <= n // 4:
+        return 'banded'
+    if np.all(np.diag(a) > 0) and np.array_equal(a, a.T):
+        return 'spd'
+    return 'general'
+
+
+def solve_linear(a, b, structure: str = 'auto') -> np.ndarray:
+    """
+    Solve a @ x = b with the factorization that matches the structure of a.
+
+    A stack of systems, a of shape (k, n, n) and b of shape (k, n), is solved in one vectorized call
+    (a batched LU), without structure detection.
+
+    :param a: The coefficient matrix (a NumPy array or a scipy.sparse matrix), or a stack of them.
+    :param b: The constant vector, or a stack of them.
+    :param structure: One of STRUCTURES, or 'auto' to detect it with detect_structure.
+                      An 'spd' matrix that is not positive definite is solved as 'general'.
+    :return: The solution x.
+
+    >>> solve_linear(np.array([[1, 2], [3, 5]]), np.array([1, 2]))
+    array([-1.,  1.])
+    >>> solve_linear(np.array([[4, 1, 1], [1, 3, 0], [1, 0, 2]]), np.array([6, 4, 3]))
+    array([1., 1., 1.])
+    >>> solve_linear(np.array([[[2, 0], [0, 4]], [[1, 1], [0, 1]]]), np.array([[2, 4], [3, 1]]))
+    array([[1., 1.],
+           [2., 1.]])
+    """
+    if not issparse(a) and np.ndim(a) == 3:
+        b = np.asarray(b)
+        if b.ndim == 2:
+            return np.linalg.solve(a, b[..., None])[..., 0]
+        return np.linalg.solve(a, b)
+
+    if structure == 'auto':
+        structure = detect_structure(a)
+    if structure not in STRUCTURES:
+        raise ValueError(f"Unknown structure {structure}, expected 'auto' or one of {', '.join(STRUCTURES)}.")
+
+    if structure == 'sparse':
+        return spsolve(a.tocsc(), b)
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if structure in ('upper', 'lower'):
+        return sc.linalg.solve_triangular(a, b, lower=structure == 'lower', check_finite=False)
+    if structure == 'banded':
+        lower, upper = _bandwidths(a)
+        return sc.linalg.solve_banded((lower, upper), _band_storage(a, lower, upper), b, check_finite=False)
+    if structure == 'spd':
+        try:
+            return sc.linalg.cho_solve(sc.linalg.cho_factor(a, check_finite=False), b, check_finite=False)
+        except np.linalg.LinAlgError:
+            pass
+    return np.linalg.solve(a, b)
+
+
+def _bandwidths(a: np.ndarray):
+    """
+    Return the lower and upper bandwidths of a: the largest distance below and above the diagonal of a nonzero.
+    """
+    nonzero = a != 0
+    rows = np.flatnonzero(nonzero.any(axis=1))
+    if rows.size == 0:
+        return 0, 0
+    # The first and last nonzero column of every nonzero row
+    first = nonzero[rows].argmax(axis=1)
+    last = a.shape[1] - 1 - nonzero[rows, ::-1].argmax(axis=1)
+    return max(int((rows - first).max()), 0), max(int((last - rows).max()), 0)
+
+
+def _band_storage(a: np.ndarray, lower: int, upper: int) -> np.ndarray:
+    """
+    The matrix in the diagonal-ordered form of scipy.linalg.solve_banded: ab[upper + i - j, j] = a[i, j].
+    """
+    n = a.shape[0]
+    ab = np.zeros((lower + upper + 1, n))
+    for k in range(-lower, upper + 1):
+        # Diagonal k (above the main diagonal for k > 0) goes to row upper - k, aligned on its columns
+        diagonal = np.diagonal(a, k)
+        if k >= 0:
+            ab[upper - k, k:] = diagonal
+        else:
+            ab[upper - k, :n + k] = diagonal
+    return ab
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class FactorizationCache:
+    """
+    A front-end to solve_linear for a matrix that is solved against many right-hand sides over time.
+
+    The factorization of every matrix (LU, Cholesky, sparse LU, or the band storage) is kept, keyed by a
+    fingerprint of the matrix (a hash of its shape, dtype and bytes), so solving against the same matrix again
+    costs O(n^2) for the fingerprint and the triangular solves, instead of O(n^3). The factors are kept in least
+    recently used order, and the oldest ones are dropped when their total size exceeds max_bytes.
+    Hashing is about a fifth of an LU factorization at n = 1000; a caller that already knows which matrix it
+    is solving can pass its own key instead.
+
+    >>> cache = FactorizationCache(max_bytes=10 ** 6)
+    >>> a = np.array([[1, 2], [3, 5]])
+    >>> cache.solve(a, np.array([1, 2]))
+    array([-1.,  1.])
+    >>> cache.solve(a.copy(), np.array([[1, 0], [0, 1]]))
+    array([[-5.,  2.],
+           [ 3., -1.]])
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, evictions=0, entries=1, nbytes=40, max_bytes=1000000)
+
+    The cached factors do not change when the matrix is changed in place after a solve:
+
+    >>> upper = np.array([[2., 1.], [0., 4.]])
+    >>> cache.solve(upper, np.array([3., 4.]))
+    array([1., 1.])
+    >>> upper[0, 0] = 100.
+    >>> cache.solve(np.array([[2., 1.], [0., 4.]]), np.array([3., 4.]))
+    array([1., 1.])
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20):
+        """
+        :param max_bytes: The memory budget for the cached factors, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def solve(self, a, b, structure: str = 'auto', key=None) -> np.ndarray:
+        """
+        Solve a @ x = b like solve_linear, reusing the factorization of a if it is cached.
+
+        :param a: The coefficient matrix (a NumPy array or a scipy.sparse matrix).
+        :param b: The constant vector, or a matrix with one right-hand side per column.
+        :param structure: As in solve_linear; only used when a is not cached.
+        :param key: A hashable that identifies a, to use instead of its fingerprint.
+        """
+        if key is None:
+            key = fingerprint(a)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = _factorize(a, structure)
+            self._store(key, entry)
+        return _solve_factorized(entry, b)
+
+    __call__ = solve
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self._nbytes, self.max_bytes)
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def _store(self, key, entry):
+        size = _nbytes(entry)
+        if size > self.max_bytes:
+            # Larger than the whole budget: used once and not kept
+            return
+        self._entries[key] = entry
+        self._nbytes += size
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= _nbytes(evicted)
+            self.evictions += 1
+
+
+def fingerprint(a) -> bytes:
+    """
+    A hash of the shape, dtype and values of a matrix, dense or sparse.
+
+    >>> fingerprint(np.eye(3)) == fingerprint(np.eye(3)), fingerprint(np.eye(3)) == fingerprint(np.eye(3, dtype=int))
+    (True, False)
+    """
+    digest = hashlib.sha256()
+    if issparse(a):
+        a = a.tocsr()
+        if not a.has_canonical_format:
+            # Equal matrices have equal arrays only once the indices are sorted and merged
+            a = a.copy()
+            a.sum_duplicates()
+        parts = (a.indptr, a.indices, a.data)
+        digest.update(b'sparse')
+    else:
+        parts = (np.ascontiguousarray(a),)
+    digest.update(repr((a.shape, str(a.dtype))).encode())
+    for part in parts:
+        digest.update(np.ascontiguousarray(part).data)
+    return digest.digest()
+
+
+def _factorize(a, structure: str = 'auto'):
+    """
+    Return (kind, factors) for solving against a: the factors are what solve_linear would compute for it.
+    """
+    if structure == 'auto':
+        structure = detect_structure(a)
+    if structure not in STRUCTURES:
+        raise ValueError(f"Unknown structure {structure}, expected 'auto' or one of {', '.join(STRUCTURES)}.")
+
+    if structure == 'sparse':
+        return 'sparse', splu(a.tocsc())
+    a = np.asarray(a, dtype=float)
+    if structure in ('upper', 'lower'):
+        # Already triangular: the matrix is its own factor. It is copied, since asarray returns the
+        # caller's own float array, which may change after it was fingerprinted.
+        return structure, np.array(a, copy=True)
+    if structure == 'banded':
+        lower, upper = _bandwidths(a)
+        return 'banded', ((lower, upper), _band_storage(a, lower, upper))
+    if structure == 'spd':
+        try:
+            return 'spd', sc.linalg.cho_factor(a, check_finite=False)
+        except np.linalg.LinAlgError:
+            pass
+    return 'general', sc.linalg.lu_factor(a, check_finite=False)
+
+
+def _solve_factorized(entry, b) -> np.ndarray:
+    kind, factors = entry
+    b = np.asarray(b, dtype=float)
+    if kind == 'sparse':
+        return factors.solve(b)
+    if kind in ('upper', 'lower'):
+        return sc.linalg.solve_triangular(factors, b, lower=kind == 'lower', check_finite=False)
+    if kind == 'banded':
+        return sc.linalg.solve_banded(*factors, b, check_finite=False)
+    if kind == 'spd':
+        return sc.linalg.cho_solve(factors, b, check_finite=False)
+    return sc.linalg.lu_solve(factors, b, check_finite=False)
+
+
+def _nbytes(entry) -> int:
+    """
+    The memory taken by the factors of a cache entry, in bytes.
+    """
+    kind, factors = entry
+    if kind == 'sparse':
+        return sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (factors.L, factors.U))
+    if kind == 'banded':
+        return factors[1].nbytes
+    if kind in ('spd', 'general'):
+        return factors[0].nbytes + getattr(factors[1], 'nbytes', 0)
+    return factors.nbytes
@@ -0,0 +1,146 @@
+import time
+from typing import Hashable, List, NamedTuple, Optional, Set
+
+import networkx as nx
+
+
+class CoverResult(NamedTuple):
+    """
+    A vertex cover and a proven lower bound on the size of a minimum vertex cover.
+    """
+    cover: Set[Hashable]
+    lower_bound: int
+
+    @property
+    def optimal(self) -> bool:
+        return len(self.cover) == self.lower_bound
+
+
+def branch_and_bound(graph: nx.Graph, time_limit: Optional[float] = None,
+                     deadline: Optional[float] = None) -> CoverResult:
+    """
+    Find a minimum vertex cover by depth-first branch and bound, with the adjacency of every vertex as an int
+    bitset.
+
+    Every search node first takes the neighbor of each degree-1 vertex, then branches on a vertex v of maximum
+    degree: either v is in the cover, or all its neighbors are. A search node is pruned when its cover size plus
+    the size of a greedy maximal matching of the remaining graph (every matched edge needs its own vertex)
+    is not smaller than the best cover found. The search starts from the greedy max-degree cover.
+
+    The search is anytime: when the time limit (in seconds) or the deadline (a time.time() value) is reached,
+    it returns the best cover found so far and the smallest lower bound of the search nodes still open.
+
+    >>> result = branch_and_bound(nx.petersen_graph())
+    >>> len(result.cover), result.lower_bound, result.optimal
+    (6, 6, True)
+    >>> branch_and_bound(nx.complete_graph(30), time_limit=0).lower_bound
+    15
+    """
+    if time_limit is not None:
+        deadline = min(deadline, time.time() + time_limit) if deadline is not None else time.time() + time_limit
+
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [0] * len(nodes)
+    forced = 0
+    for u, v in graph.edges():
+        if u == v:
+            forced |= 1 << index[u]
+        adjacency[index[u]] |= 1 << index[v]
+        adjacency[index[v]] |= 1 << index[u]
+
+    alive = ((1 << len(nodes)) - 1) & ~forced
+    best = forced | _greedy_cover(adjacency, alive)
+    root_bound = forced.bit_count() + _matching_bound(adjacency, alive)
+
+    # Search nodes: (remaining vertices, vertices taken)
+    stack = [(alive, forced)]
+    steps = 0
+    while stack:
+        steps += 1
+        if deadline is not None and steps % 64 == 1 and time.time() >= deadline:
+            open_bound = min(taken.bit_count() + _matching_bound(adjacency, alive) for alive, taken in stack)
+            return _result(nodes, best, max(root_bound, min(open_bound, best.bit_count())))
+
+        alive, taken = stack.pop()
+        alive, taken = _take_degree_one(adjacency, alive, taken)
+        if taken.bit_count() + _matching_bound(adjacency, alive) >= best.bit_count():
+            continue
+
+        vertex, neighbors = _max_degree(adjacency, alive)
+        if vertex is None:
+            # No edges are left, so this cover is better than the best one
+            best = taken
+            continue
+        # Explore taking the vertex first, so push it last
+        stack.append((alive & ~neighbors & ~(1 << vertex), taken | neighbors))
+        stack.append((alive & ~(1 << vertex), taken | 1 << vertex))
+
+    return _result(nodes, best, best.bit_count())
+
+
+def _result(nodes: List[Hashable], cover: int, lower_bound: int) -> CoverResult:
+    return CoverResult({node for i, node in enumerate(nodes) if cover >> i & 1}, lower_bound)
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _max_degree(adjacency: List[int], alive: int):
+    """
+    Return a vertex of maximum degree in the remaining graph and its neighbors, or (None, 0) if it has no edges.
+    """
+    vertex, neighbors, degree = None, 0, 0
+    for v in _bits(alive):
+        v_neighbors = adjacency[v] & alive
+        if v_neighbors.bit_count() > degree:
+            vertex, neighbors, degree = v, v_neighbors, v_neighbors.bit_count()
+    return vertex, neighbors
+
+
+def _take_degree_one(adjacency: List[int], alive: int, taken: int):
+    """
+    Take the neighbor of every degree-1 vertex (some minimum cover has it), until there is none.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for v in _bits(alive):
+            neighbors = adjacency[v] & alive
+            # Skip the vertices removed earlier in this pass
+            if alive >> v & 1 and neighbors and neighbors & (neighbors - 1) == 0:
+                alive &= ~neighbors & ~(1 << v)
+                taken |= neighbors
+                changed = True
+    return alive, taken
+
+
+def _matching_bound(adjacency: List[int], alive: int) -> int:
+    """
+    The size of a greedy maximal matching of the remaining graph, a lower bound on its minimum cover.
+    """
+    free, size = alive, 0
+    for v in _bits(alive):
+        if free >> v & 1:
+            partners = adjacency[v] & free
+            if partners:
+                free &= ~(1 << v) & ~(partners & -partners)
+                size += 1
+    return size
+
+
+def _greedy_cover(adjacency: List[int], alive: int) -> int:
+    """
+    The cover found by repeatedly taking a vertex of maximum degree.
+    """
+    cover = 0
+    while True:
+        vertex, _ = _max_degree(adjacency, alive)
+        if vertex is None:
+            return cover
+        cover |= 1 << vertex
+        alive &= ~(1 << vertex)
@@ -0,0 +1,181 @@
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+# The reduction rules, in the order of the report
+RULES = ('self-loop', 'isolated', 'degree-1', 'degree-2 triangle', 'degree-2 fold', 'high degree')
+
+
+class Folded:
+    """
+    The vertex that replaces a folded degree-2 vertex and its two neighbors. Equal by id, so that it
+    survives being sent to another process.
+    """
+    __slots__ = ('id',)
+
+    def __init__(self, id: int):
+        self.id = id
+
+    def __eq__(self, other):
+        return isinstance(other, Folded) and other.id == self.id
+
+    def __hash__(self):
+        return hash((Folded, self.id))
+
+    def __repr__(self):
+        return f'Folded({self.id})'
+
+
+class Kernel:
+    """
+    The result of kernelize: a reduced graph whose minimum vertex covers lift to minimum vertex covers
+    of the original graph.
+
+    :ivar graph: The reduced graph.
+    :ivar taken: The vertices the reductions put in the cover.
+    :ivar folds: The (vertex, neighbor, neighbor, folded vertex) degree-2 folds, in order.
+    :ivar stats: For every rule, [applications, vertices removed, edges removed].
+    :ivar original: The number of vertices and of edges of the original graph.
+    """
+
+    def __init__(self, graph: nx.Graph, taken: List[Hashable], folds: List[Tuple], stats: Dict[str, List[int]],
+                 original: Tuple[int, int]):
+        self.graph = graph
+        self.taken = taken
+        self.folds = folds
+        self.stats = stats
+        self.original = original
+
+    @property
+    def offset(self) -> int:
+        """
+        The size of a minimum cover of the original graph minus that of the reduced graph.
+        """
+        return len(self.taken) + len(self.folds)
+
+    def lift(self, cover: Iterable[Hashable]) -> Set[Hashable]:
+        """
+        Turn a minimum vertex cover of the reduced graph into a minimum vertex cover of the original graph.
+        """
+        cover = set(cover).union(self.taken)
+        # Undo the folds from the last one: the folded vertex stands for both neighbors, or else for the vertex
+        for vertex, u, w, folded in reversed(self.folds):
+            if folded in cover:
+                cover.remove(folded)
+                cover.update((u, w))
+            else:
+                cover.add(vertex)
+        return cover
+
+    def report(self) -> str:
+        """
+        A table of how much each rule shrank the instance.
+        """
+        vertices, edges = self.original
+        lines = [f"{'rule':<20}{'applied':<10}{'vertices':<10}edges",
+                 f"{'original':<20}{'':<10}{vertices:<10}{edges}"]
+        for rule in RULES:
+            applied, removed_vertices, removed_edges = self.stats[rule]
+            lines.append(f"{rule:<20}{applied:<10}{-removed_vertices:<10}{-removed_edges}")
+        lines.append(f"{'kernel':<20}{'':<10}{self.graph.number_of_nodes():<10}{self.graph.number_of_edges()}")
+        return '\n'.join(lines)
+
+
+def kernelize(graph: nx.Graph, bound: Optional[int] = None) -> Kernel:
+    """
+    Reduce a vertex cover instance with the standard rules, applied until none applies:
+
+    - self-loop: a vertex with a self-loop is in every cover.
+    - isolated: a vertex without edges is in no minimum cover.
+    - degree-1: some minimum cover has the neighbor of a degree-1 vertex.
+    - degree-2 triangle: if the two neighbors of a degree-2 vertex are adjacent, some minimum cover has both.
+    - degree-2 fold: otherwise the vertex and its neighbors are replaced by one vertex adjacent to all their
+      other neighbors, and the minimum cover size drops by exactly 1.
+    - high degree (only with a bound k): a vertex of degree > k is in every cover of size <= k, and then the
+      bound drops by 1.
+
+    :param bound: An upper bound on the size of a minimum cover. The high-degree rule is exact when the minimum
+                  cover is at most the bound; otherwise the lifted covers are still covers, but maybe not minimum.
+
+    >>> kernel = kernelize(nx.Graph([(0, 1), (1, 2), (2, 3), (3, 0), (3, 4), (5, 5)]))
+    >>> kernel.graph.number_of_edges(), kernel.offset, sorted(kernel.lift([]))
+    (0, 3, [1, 3, 5])
+    """
+    adjacency = {vertex: set(graph[vertex]) for vertex in graph}
+    stats = {rule: [0, 0, 0] for rule in RULES}
+    original = (graph.number_of_nodes(), graph.number_of_edges())
+    edges = original[1]
+    taken, folds = [], []
+    queue = deque(adjacency)
+
+    def remove(vertex):
+        nonlocal edges
+        for neighbor in adjacency.pop(vertex):
+            if neighbor != vertex:
+                adjacency[neighbor].discard(vertex)
+                queue.append(neighbor)
+            edges -= 1
+
+    def apply(rule, vertices_before, edges_before):
+        stats[rule][0] += 1
+        stats[rule][1] += vertices_before - len(adjacency)
+        stats[rule][2] += edges_before - edges
+
+    for vertex in [vertex for vertex in adjacency if vertex in adjacency[vertex]]:
+        before = len(adjacency), edges
+        taken.append(vertex)
+        remove(vertex)
+        apply('self-loop', *before)
+
+    while queue:
+        while queue:
+            vertex = queue.popleft()
+            if vertex not in adjacency:
+                continue
+            neighbors = adjacency[vertex]
+            before = len(adjacency), edges
+
+            if not neighbors:
+                del adjacency[vertex]
+                apply('isolated', *before)
+            elif len(neighbors) == 1:
+                neighbor = next(iter(neighbors))
+                taken.append(neighbor)
+                remove(neighbor)
+                del adjacency[vertex]
+                apply('degree-1', *before)
+            elif len(neighbors) == 2:
+                u, w = neighbors
+                if w in adjacency[u]:
+                    taken.extend((u, w))
+                    remove(u)
+                    remove(w)
+                    del adjacency[vertex]
+                    apply('degree-2 triangle', *before)
+                else:
+                    folded = Folded(len(folds))
+                    outside = (adjacency[u] | adjacency[w]) - {vertex}
+                    for removed in (vertex, u, w):
+                        remove(removed)
+                    adjacency[folded] = outside
+                    for neighbor in outside:
+                        adjacency[neighbor].add(folded)
+                    edges += len(outside)
+                    folds.append((vertex, u, w, folded))
+                    queue.append(folded)
+                    apply('degree-2 fold', *before)
+            elif bound is not None and len(neighbors) > bound - len(taken) - len(folds) >= 0:
+                taken.append(vertex)
+                remove(vertex)
+                apply('high degree', *before)
+
+        if bound is not None:
+            # The bound left dropped since the vertices were checked
+            budget = bound - len(taken) - len(folds)
+            queue.extend(vertex for vertex, neighbors in adjacency.items() if len(neighbors) > budget >= 0)
+
+    reduced = nx.Graph()
+    reduced.add_nodes_from(adjacency)
+    reduced.add_edges_from((vertex, neighbor) for vertex, neighbors in adjacency.items() for neighbor in neighbors)
+    return Kernel(reduced, taken, folds, stats, original)
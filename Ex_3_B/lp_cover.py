@@ -0,0 +1,125 @@
+from collections import deque
+from typing import Iterable, List
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching
+
+from branch_and_bound import CoverResult
+
+
+def lp_cover(graph: nx.Graph) -> CoverResult:
+    """
+    Return a vertex cover of at most twice the minimum size, with the LP lower bound, without an integer program.
+
+    The LP relaxation of vertex cover has a half-integral optimum x (Nemhauser-Trotter), found from a maximum
+    matching of the bipartite double cover of the graph (vertices u' and u'' for every vertex u, and edges u'-v''
+    and v'-u'' for every edge u-v): by Konig's theorem a minimum cover C of the double cover gives
+    x[u] = (|C & {u'}| + |C & {u''}|) / 2. Some minimum cover contains all the vertices with x = 1 and none with
+    x = 0, so those are fixed. The vertices with x = 1/2 are all taken, and then those whose neighbors are all
+    in the cover are dropped again, lowest degree first.
+
+    :return: The cover, and the LP optimum rounded up as the lower bound. Vertices with self-loops are in every
+             cover, and are taken before solving the LP.
+
+    >>> result = lp_cover(nx.Graph([('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'e')]))
+    >>> sorted(result.cover), result.lower_bound
+    (['b', 'd'], 2)
+    >>> result = lp_cover(nx.petersen_graph())
+    >>> len(result.cover), result.lower_bound
+    (7, 5)
+    """
+    return lp_covers([graph])[0]
+
+
+def lp_covers(graphs: Iterable[nx.Graph]) -> List[CoverResult]:
+    """
+    Run lp_cover on many graphs at once: their disjoint union is solved with a single matching.
+
+    >>> [(len(result.cover), result.lower_bound) for result in lp_covers([nx.path_graph(5), nx.cycle_graph(5)])]
+    [(2, 2), (3, 3)]
+    """
+    # Number the vertices of all the graphs consecutively
+    graphs = list(graphs)
+    nodes, sources, targets, starts = [], [], [], [0]
+    for graph in graphs:
+        index = {node: len(nodes) + i for i, node in enumerate(graph.nodes)}
+        nodes.extend(graph.nodes)
+        for u, v in graph.edges():
+            sources.append(index[u])
+            targets.append(index[v])
+        starts.append(len(nodes))
+
+    twice_x = _half_integral(len(nodes), np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64))
+    cover = _round(len(nodes), np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64), twice_x)
+
+    results = []
+    for start, end in zip(starts, starts[1:]):
+        # The LP optimum of every graph is sum(x) over its vertices; a cover has an integer size
+        lower_bound = -(-int(twice_x[start:end].sum()) // 2)
+        results.append(CoverResult({nodes[i] for i in range(start, end) if cover[i]}, lower_bound))
+    return results
+
+
+def _half_integral(n: int, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Return 2 * x for a half-integral optimum x of the LP relaxation (values 0, 1 or 2).
+    The vertices with self-loops are set to 2, and the LP is solved on the rest of the graph.
+    """
+    forced = np.zeros(n, dtype=bool)
+    forced[sources[sources == targets]] = True
+    rest = ~(forced[sources] | forced[targets])
+    sources, targets = sources[rest], targets[rest]
+
+    # The double cover: row u stands for u', column v for v''
+    rows = np.concatenate((sources, targets))
+    columns = np.concatenate((targets, sources))
+    double = csr_matrix((np.ones(rows.size, dtype=np.int8), (rows, columns)), shape=(n, n))
+    double.sum_duplicates()
+    row_match = maximum_bipartite_matching(double, perm_type='column')
+    column_match = np.full(n, -1, dtype=np.int64)
+    column_match[row_match[row_match >= 0]] = np.flatnonzero(row_match >= 0)
+
+    # Konig: Z holds the vertices reachable from the unmatched rows by alternating paths;
+    # the minimum cover is the rows outside Z and the columns inside Z
+    offsets, neighbors, column_match = double.indptr.tolist(), double.indices.tolist(), column_match.tolist()
+    row_reached = [False] * n
+    column_reached = [False] * n
+    queue = deque(np.flatnonzero(row_match < 0).tolist())
+    for row in queue:
+        row_reached[row] = True
+    while queue:
+        row = queue.popleft()
+        for i in range(offsets[row], offsets[row + 1]):
+            column = neighbors[i]
+            if not column_reached[column]:
+                column_reached[column] = True
+                matched = column_match[column]
+                if matched >= 0 and not row_reached[matched]:
+                    row_reached[matched] = True
+                    queue.append(matched)
+
+    twice_x = (~np.array(row_reached, dtype=bool)).astype(np.int64) + np.array(column_reached, dtype=np.int64)
+    twice_x[forced] = 2
+    return twice_x
+
+
+def _round(n: int, sources: np.ndarray, targets: np.ndarray, twice_x: np.ndarray) -> np.ndarray:
+    """
+    Return the cover of the vertices with x = 1 and of the vertices with x = 1/2 that are not redundant.
+    """
+    in_cover = (twice_x > 0).tolist()
+    half = np.flatnonzero(twice_x == 1)
+
+    # Among the x = 1/2 vertices, every neighbor has x >= 1/2, so all are in the cover to start with
+    proper = sources != targets
+    graph = csr_matrix((np.ones(2 * int(proper.sum()), dtype=np.int8),
+                        (np.concatenate((sources[proper], targets[proper])),
+                         np.concatenate((targets[proper], sources[proper])))), shape=(n, n))
+    offsets, neighbors = graph.indptr.tolist(), graph.indices.tolist()
+    degrees = np.diff(graph.indptr)
+    for vertex in half[np.argsort(degrees[half], kind='stable')].tolist():
+        if all(in_cover[neighbor] for neighbor in neighbors[offsets[vertex]:offsets[vertex + 1]]):
+            in_cover[vertex] = False
+    return np.array(in_cover, dtype=bool)
@@ -1,34 +1,235 @@
-import subprocess, sys
-import networkx as nx, cvxpy as cp, numpy as np, matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+from typing import Hashable, Optional, Set
+import time
+import networkx as nx, numpy as np
 from networkx.algorithms.approximation import min_weighted_vertex_cover
+from branch_and_bound import CoverResult, branch_and_bound
+from kernel import kernelize
+from lp_cover import lp_cover
 
-subprocess.check_call([sys.executable, "-m", "pip", "install", "cvxpy"], stdout=subprocess.DEVNULL)
-subprocess.check_call([sys.executable, "-m", "pip", "install", "cvxopt"], stdout=subprocess.DEVNULL)
+from instrument import collect, instrumented, worker
 
 
-def mincover(graph: nx.Graph) -> int:
-    # Number of nodes
-    n = len(graph.nodes)
+@instrumented()
+def mincover(graph: nx.Graph, solver: str = 'CBC', reduce: bool = True, workers: int = 1,
+             bound: Optional[int] = None, engine: str = 'ilp', time_limit: Optional[float] = None) -> int:
+    """
+    Return the size of a minimum vertex cover of the graph, by solving its integer program:
+    minimize sum(x) subject to x[u] + x[v] >= 1 for every edge (u, v), with x binary.
+
+    The nodes can have any (hashable) labels. cvxpy is only imported on the first call.
+
+    By default the graph is first reduced with the standard vertex cover rules (see kernel.kernelize, whose
+    report() shows how much each rule shrank the instance), and every connected component of the reduced graph
+    is solved as a separate, smaller integer program.
+
+    :param solver: The name of the cvxpy mixed-integer solver to use.
+    :param reduce: Whether to reduce the graph and split it into components first.
+    :param workers: The number of processes solving the components in parallel; 1 solves them in this process.
+    :param bound: An upper bound on the size of a minimum cover, which enables the high-degree rule.
+    :param engine: 'ilp' to solve the integer program with the solver, 'branch_and_bound' for the native
+                   engine of branch_and_bound.py, which needs no solver, or 'lp' for the certified approximation
+                   of lp_cover.py (at most twice the minimum, not the minimum).
+    :param time_limit: With the branch_and_bound engine, the wall-clock budget in seconds; when it runs out,
+                       the size of the best cover found so far is returned (see cover_with_bound).
+
+    >>> mincover(nx.Graph([('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd')]), solver='HIGHS')
+    2
+    >>> mincover(nx.petersen_graph(), solver='HIGHS', reduce=False)
+    6
+    >>> mincover(nx.petersen_graph(), engine='branch_and_bound')
+    6
+    >>> mincover(nx.petersen_graph(), engine='lp')
+    7
+    """
+    return len(minimum_cover(graph, solver, reduce, workers, bound, engine, time_limit))
+
+
+def minimum_cover(graph: nx.Graph, solver: str = 'CBC', reduce: bool = True, workers: int = 1,
+                  bound: Optional[int] = None, engine: str = 'ilp',
+                  time_limit: Optional[float] = None) -> Set[Hashable]:
+    """
+    Return a minimum vertex cover of the graph, as mincover.
+    """
+    return cover_with_bound(graph, solver, reduce, workers, bound, engine, time_limit).cover
+
+
+def cover_with_bound(graph: nx.Graph, solver: str = 'CBC', reduce: bool = True, workers: int = 1,
+                     bound: Optional[int] = None, engine: str = 'ilp',
+                     time_limit: Optional[float] = None) -> CoverResult:
+    """
+    Return a vertex cover of the graph and a proven lower bound on the minimum cover size, as mincover.
+    The cover is minimum (and equal to the bound) unless the time limit ran out or the engine is 'lp'.
+    For many graphs, lp_cover.lp_covers solves the LP of all of them at once.
+
+    >>> result = cover_with_bound(nx.complete_graph(40), engine='branch_and_bound', time_limit=0)
+    >>> len(result.cover), result.lower_bound, result.optimal
+    (39, 20, False)
+    """
+    if engine not in _ENGINES:
+        raise ValueError(f"Unknown engine {engine}, expected one of {', '.join(_ENGINES)}.")
+    deadline = time.time() + time_limit if time_limit is not None else None
+
+    if engine == 'lp':
+        # The LP does not need the graph split into components
+        if not reduce:
+            return lp_cover(graph)
+        kernel = kernelize(graph, bound)
+        result = lp_cover(kernel.graph)
+        return CoverResult(kernel.lift(result.cover), kernel.offset + result.lower_bound)
+
+    if not reduce:
+        return _component_cover(list(graph.edges()), solver, engine, deadline)
+
+    kernel = kernelize(graph, bound)
+    components = sorted((list(kernel.graph.subgraph(component).edges())
+                         for component in nx.connected_components(kernel.graph)), key=len, reverse=True)
+
+    if workers == 1:
+        results = list(map(_component_cover, components, repeat(solver), repeat(engine), repeat(deadline)))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            # The largest components first, and the many small ones in chunks
+            results = list(map(collect, pool.map(worker(_component_cover), components, repeat(solver),
+                                                 repeat(engine), repeat(deadline),
+                                                 chunksize=max(1, len(components) // (4 * workers)))))
+    return CoverResult(kernel.lift(node for result in results for node in result.cover),
+                       kernel.offset + sum(result.lower_bound for result in results))
+
+
+_ENGINES = ('ilp', 'branch_and_bound', 'lp')
+
+
+@instrumented('mincover.component')
+def _component_cover(edges: list, solver: str, engine: str, deadline: Optional[float]) -> CoverResult:
+    """
+    Find a minimum cover of a graph given by its edges with the engine.
+    """
+    if not edges:
+        return CoverResult(set(), 0)
+    if engine == 'branch_and_bound':
+        return branch_and_bound(nx.Graph(edges), deadline=deadline)
+
+    problem, x, nodes = _cover_problem(nx.Graph(edges))
+
+    # Solve the problem
+    problem.solve(solver=solver)
+
+    # The nodes whose binary variable is 1 form the cover
+    cover = {node for node, value in zip(nodes, x.value) if value > 0.5}
+    return CoverResult(cover, len(cover))
+
+
+def _cover_problem(graph: nx.Graph, per_edge: bool = False):
+    """
+    Build the vertex cover integer program of the graph.
+
+    The edge constraints are one sparse incidence-matrix constraint A @ x >= 1, where row i of A has a 1 in
+    the columns of the two ends of edge i. With per_edge, they are built one constraint object per edge instead,
+    as before (only kept for comparison).
+
+    :return: The cvxpy problem, its variable and the list of nodes, in the order of the variable.
+    """
+    import cvxpy as cp
+    from scipy.sparse import csr_matrix
+
+    # Map the node labels to the variable indices 0..n-1
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
 
     # Create a binary variable for each node
-    x = cp.Variable(n, boolean=True)
+    x = cp.Variable(len(nodes), boolean=True)
 
     # Create the constraints: for each edge (u, v), u or v (or both) must be in the cover
-    constraints = []
-    for u, v in graph.edges():
-        constraints.append(x[u] + x[v] >= 1)
+    if per_edge:
+        constraints = [x[index[u]] + x[index[v]] >= 1 for u, v in graph.edges()]
+    else:
+        ends = np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64)
+        m = len(ends)
+        # A self-loop gives a row with a single entry 2 (duplicate entries are summed), so its node must be chosen
+        incidence = csr_matrix((np.ones(2 * m), ends.ravel(), np.arange(0, 2 * m + 1, 2)), shape=(m, len(nodes)))
+        constraints = [incidence @ x >= 1]
 
     # The objective is to minimize the sum of the binary variables
-    objective = cp.Minimize(cp.sum(x))
+    return cp.Problem(cp.Minimize(cp.sum(x)), constraints), x, nodes
 
-    # Formulate the problem
-    problem = cp.Problem(objective, constraints)
 
-    # Solve the problem
-    problem.solve(solver=cp.CBC)  # Use the CBC solver for integer programming
+def compare_model_construction(sizes=(10 ** 3, 10 ** 4), solver: str = 'CBC', edges_per_node: int = 1):
+    """
+    Compare the time to build and canonicalize the integer program (get_problem_data) with one constraint
+    per edge and with the incidence-matrix constraint, and then the time to solve it, on gnm_random_graph
+    inputs. The per-edge model takes about 15 minutes to build at 10 ** 5 edges.
+    """
+    print(f"{'edges':<10}{'model':<12}{'build (s)':<12}{'solve (s)':<12}cover")
+    for size in sizes:
+        graph = nx.gnm_random_graph(size // edges_per_node, size, seed=size)
+        for name, per_edge in (('per edge', True), ('incidence', False)):
+            start = perf_counter()
+            problem, _, _ = _cover_problem(graph, per_edge)
+            problem.get_problem_data(solver)
+            build = perf_counter() - start
+            start = perf_counter()
+            problem.solve(solver=solver)
+            solve = perf_counter() - start
+            print(f"{size:<10}{name:<12}{build:<12.2f}{solve:<12.2f}{int(round(problem.value))}")
+
+
+def compare_kernelization(components: int = 500, nodes: int = 20, edges: int = 40, solver: str = 'CBC',
+                          workers: int = 4):
+    """
+    Compare solving a sparse graph made of many gnm_random_graph(nodes, edges) components as one integer
+    program with reducing it first and solving the components of the kernel, in this process and across
+    a process pool. Prints the reduction report.
+    """
+    graph = nx.disjoint_union_all(nx.gnm_random_graph(nodes, edges, seed=seed) for seed in range(components))
+    start = perf_counter()
+    kernel = kernelize(graph)
+    print(f"kernelized in {perf_counter() - start:.2f} sec, "
+          f"{nx.number_connected_components(kernel.graph)} components")
+    print(kernel.report())
+
+    print(f"{'mode':<20}{'time (s)':<10}cover")
+    for name, reduce, pool in (('one program', False, 1), ('components', True, 1), ('parallel', True, workers)):
+        start = perf_counter()
+        size = mincover(graph, solver, reduce, pool)
+        print(f"{name:<20}{perf_counter() - start:<10.2f}{size}")
+
+
+def compare_engines(sizes=(50, 100, 150, 200), solver: str = 'CBC', time_limit: float = 60):
+    """
+    Compare the ilp engine (with the solver) and the branch_and_bound engine on gnm_random_graph(n, 3 * n)
+    inputs, both after kernelization: the time, the cover size and the lower bound proven by branch and bound.
+    """
+    print(f"{'nodes':<8}{'ilp (s)':<10}{'cover':<8}{'b&b (s)':<10}{'cover':<8}lower bound")
+    for n in sizes:
+        graph = nx.gnm_random_graph(n, 3 * n, seed=n)
+        start = perf_counter()
+        ilp = mincover(graph, solver)
+        ilp_time = perf_counter() - start
+        start = perf_counter()
+        result = cover_with_bound(graph, engine='branch_and_bound', time_limit=time_limit)
+        bnb_time = perf_counter() - start
+        print(f"{n:<8}{ilp_time:<10.2f}{ilp:<8}{bnb_time:<10.2f}{len(result.cover):<8}{result.lower_bound}")
+
 
-    # The optimal value of the objective function is the size of the minimum vertex cover
-    return int(problem.value)
+def compare_lp_with_ilp(sizes=(200, 10 ** 3, 10 ** 4, 10 ** 5), solver: str = 'CBC', ilp_limit: int = 200):
+    """
+    Compare the lp engine with the ilp engine on gnm_random_graph(n, 3 * n) inputs, both after kernelization:
+    the time, the cover size and the LP lower bound. The ILP is only run up to ilp_limit nodes.
+    """
+    print(f"{'nodes':<10}{'lp (s)':<10}{'cover':<10}{'bound':<10}{'ilp (s)':<10}minimum")
+    for n in sizes:
+        graph = nx.gnm_random_graph(n, 3 * n, seed=n)
+        start = perf_counter()
+        result = cover_with_bound(graph, engine='lp')
+        line = f"{n:<10}{perf_counter() - start:<10.2f}{len(result.cover):<10}{result.lower_bound:<10}"
+        if n <= ilp_limit:
+            start = perf_counter()
+            minimum = mincover(graph, solver)
+            line += f"{perf_counter() - start:<10.2f}{minimum}"
+        print(line)
 
 
 def test_mincover():
@@ -60,7 +261,7 @@ def test_mincover():
     for n in range(10, 51, 10):  # Test with graphs of sizes 10, 20, 30, 40, and 50
         G = nx.gnm_random_graph(n, 10 * n)  # Generate a random graph with approximately 10*n edges
         result = mincover(G)
-        expected = len(nx.min_weighted_vertex_cover(G))
+        expected = len(min_weighted_vertex_cover(G))
         assert result <= expected, "Test case 5 failed"
 
 
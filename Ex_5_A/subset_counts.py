@@ -0,0 +1,129 @@
+import numpy as np
+
+
+def subset_sum_histogram(numbers, limit: int) -> np.ndarray:
+    """
+
+    Count the subsets of the input numbers by their sum, for all sums up to a limit, with dynamic programming.
+    Runs in time proportional to len(numbers) * limit instead of to the number of subsets.
+
+    :param numbers: List of non-negative integers.
+    :param limit: The largest sum to count.
+    :return: An array h of length limit + 1, where h[s] is the number of subsets whose sum is s
+             (the number of times sorted_subset_sums(numbers) yields s).
+
+    >>> subset_sum_histogram([1,2,3], 6).tolist()
+    [1, 1, 1, 2, 1, 1, 1]
+
+    >>> subset_sum_histogram(range(100), 4).tolist()
+    [2, 2, 2, 4, 4]
+
+    >>> subset_sum_histogram([2, 4, 8, 16], 3).tolist()
+    [1, 0, 1, 0]
+
+    >>> int(subset_sum_histogram(range(1, 101), 100)[100])  # partitions of 100 into distinct parts
+    444793
+
+    >>> subset_sum_histogram([1, -1], 3)
+    Traceback (most recent call last):
+    ValueError: numbers must be non-negative integers.
+
+    """
+
+    numbers = _validate(numbers)
+    if limit < 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Only numbers up to the limit (and zeros, which double every count) can change the histogram.
+    # Up to 2**62 subsets fit in int64; beyond that, fall back to Python integers.
+    relevant = [number for number in numbers if number <= limit]
+    dtype = np.int64 if len(relevant) < 63 else object
+
+    histogram = np.zeros(limit + 1, dtype=dtype)
+    histogram[0] = 1
+    for number in relevant:
+        if number == 0:
+            histogram *= 2
+        else:
+            # The right side is computed before the assignment, so each number is used at most once
+            histogram[number:] = histogram[number:] + histogram[:limit + 1 - number]
+    return histogram
+
+
+def count_subset_sums_upto(numbers, limit: int) -> int:
+    """
+
+    Count the subsets of the input numbers whose sum is at most a limit, i.e.
+    len(list(takewhile(lambda x: x <= limit, sorted_subset_sums(numbers)))), without enumerating them.
+
+    :param numbers: List of non-negative integers.
+    :param limit: The largest sum to count.
+    :return: The number of subsets (with multiplicity) whose sum is at most limit.
+
+    >>> from itertools import takewhile
+    >>> from sums import sorted_subset_sums_compact
+
+    >>> count_subset_sums_upto(range(1,100), 6)
+    14
+
+    >>> count_subset_sums_upto(list(range(90,100)) + list(range(920,1000)), 1000)
+    1104
+
+    >>> count_subset_sums_upto(range(1, 10), 100)
+    512
+
+    >>> count_subset_sums_upto([1] * 70, 3) == len(list(takewhile(lambda x: x <= 3, sorted_subset_sums_compact([1] * 70))))
+    True
+
+    >>> count_subset_sums_upto([0] * 64 + [1], 1)
+    36893488147419103232
+
+    """
+
+    return int(subset_sum_histogram(numbers, limit).sum())
+
+
+def exists_subset_sum(numbers, target: int) -> bool:
+    """
+
+    Check whether some subset of the input numbers sums exactly to a target, using a bitset of reachable sums.
+
+    :param numbers: List of non-negative integers.
+    :param target: The required sum.
+    :return: True if some subset sums to target.
+
+    >>> exists_subset_sum([3, 34, 4, 12, 5, 2], 9)
+    True
+
+    >>> exists_subset_sum([3, 34, 4, 12, 5, 2], 30)
+    False
+
+    >>> exists_subset_sum([], 0)
+    True
+
+    >>> exists_subset_sum(range(0, 2000, 2), 999999)
+    False
+
+    """
+
+    numbers = _validate(numbers)
+    if target < 0:
+        return False
+
+    # Bit s of reachable is set iff some subset of the numbers seen so far sums to s
+    mask = (1 << (target + 1)) - 1
+    reachable = 1
+    for number in numbers:
+        if number <= target:
+            reachable |= (reachable << number) & mask
+            if reachable >> target & 1:
+                return True
+    return bool(reachable >> target & 1)
+
+
+def _validate(numbers) -> list:
+    numbers = list(numbers)
+    if any(not isinstance(number, (int, np.integer)) or number < 0 for number in numbers):
+        raise ValueError("numbers must be non-negative integers.")
+    return [int(number) for number in numbers]
+
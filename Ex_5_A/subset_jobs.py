@@ -0,0 +1,152 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+from subset_counts import subset_sum_histogram
+from sums import sorted_subset_states
+
+
+class SubsetSumEnumerator:
+    """
+
+    Iterator over all subset sums of a list of non-negative numbers in sorted order (the sequence of
+    sorted_subset_sums), whose state can be saved and restored, so a long enumeration can stop and resume.
+
+    It uses the successors of sorted_subset_sums_compact, so the state is just the sorted numbers and a heap
+    that grows with the number of sums yielded so far.
+
+    >>> from itertools import islice
+    >>> enumerator = SubsetSumEnumerator([3, 1, 2])
+    >>> list(islice(enumerator, 4))
+    [0, 1, 2, 3]
+    >>> state = json.loads(json.dumps(enumerator.get_state()))
+    >>> list(SubsetSumEnumerator.from_state(state))
+    [3, 4, 5, 6]
+    >>> list(enumerator)
+    [3, 4, 5, 6]
+
+    >>> list(SubsetSumEnumerator([]))
+    [0]
+
+    """
+
+    def __init__(self, numbers=()):
+        self.numbers = sorted(numbers)
+        if self.numbers and self.numbers[0] < 0:
+            raise ValueError("numbers must be non-negative.")
+        # (current_sum, index of the largest element); index -1 is the empty subset, which can only be extended
+        self.heap = [(0, -1)]
+        self.yielded = 0
+        self._states = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._states is None:
+            # Created on first use, so it runs over the heap restored by from_state
+            self._states = sorted_subset_states(self.numbers, self.heap)
+        current_sum, _ = next(self._states)
+        self.yielded += 1
+        return current_sum
+
+    def get_state(self) -> dict:
+        """
+        Return the state of the enumeration as a JSON-serializable dict.
+        """
+        return {"numbers": list(self.numbers), "heap": [list(entry) for entry in self.heap], "yielded": self.yielded}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SubsetSumEnumerator":
+        """
+        Create an enumerator that continues from a state returned by get_state.
+        """
+        enumerator = cls()
+        enumerator.numbers = list(state["numbers"])
+        enumerator.heap = [tuple(entry) for entry in state["heap"]]
+        enumerator.yielded = state["yielded"]
+        return enumerator
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.get_state(), file)
+
+    @classmethod
+    def load(cls, path: str) -> "SubsetSumEnumerator":
+        with open(path) as file:
+            return cls.from_state(json.load(file))
+
+
+def sharded_subset_sums(numbers, limit: int, shards: int = 8, workers: int = None):
+    """
+
+    Generate all subset sums up to a limit in sorted order, i.e.
+    takewhile(lambda x: x <= limit, sorted_subset_sums(numbers)), computing them in a process pool.
+
+    The range 0..limit is split into value intervals with about the same number of sums each
+    (from subset_sum_histogram), each worker produces the sorted sums of one interval, and the intervals
+    are yielded in order.
+
+    :param numbers: List of non-negative integers.
+    :param limit: The largest sum to generate.
+    :param shards: The number of value intervals.
+    :param workers: The number of worker processes (default: the number of CPUs).
+    :return: Generator of sorted subset sums up to limit.
+
+    >>> list(sharded_subset_sums(range(1,100), 6, shards=3, workers=2))
+    [0, 1, 2, 3, 3, 4, 4, 5, 5, 5, 6, 6, 6, 6]
+
+    >>> from itertools import takewhile
+    >>> from sums import sorted_subset_sums
+    >>> numbers = list(range(90,100)) + list(range(920,1000))
+    >>> list(sharded_subset_sums(numbers, 1000, workers=2)) == list(takewhile(lambda x : x <= 1000, sorted_subset_sums(numbers)))
+    True
+
+    """
+
+    numbers = sorted(int(number) for number in numbers if number <= limit)
+    if limit < 0:
+        return
+
+    # Interval k is [bounds[k], bounds[k + 1]); cut where the cumulative count crosses k / shards of the total
+    cumulative = list(accumulate(subset_sum_histogram(numbers, limit).tolist()))
+    total = cumulative[-1]
+    bounds = [0]
+    for value, count in enumerate(cumulative):
+        if count * shards >= total * len(bounds) and value + 1 > bounds[-1]:
+            bounds.append(value + 1)
+    if bounds[-1] != limit + 1:
+        bounds.append(limit + 1)
+
+    with ProcessPoolExecutor(workers) as pool:
+        for interval_sums in pool.map(_interval_sums, [numbers] * (len(bounds) - 1), bounds[:-1], bounds[1:]):
+            yield from interval_sums
+
+
+def _interval_sums(numbers: list, lo: int, hi: int) -> list:
+    """
+    Return the sorted list of subset sums s of the sorted non-negative numbers with lo <= s < hi.
+
+    A depth-first search decides for each number whether to take it, and prunes a branch when its sum is
+    already >= hi or when even taking all the remaining numbers cannot reach lo.
+    """
+    suffix = list(accumulate(reversed(numbers), initial=0))[::-1]  # suffix[i] = sum(numbers[i:])
+    sums = []
+    stack = [(0, 0)]  # (sum of the chosen numbers, index of the next number to decide)
+    while stack:
+        current_sum, index = stack.pop()
+        if current_sum >= hi or current_sum + suffix[index] < lo:
+            continue
+        if index == len(numbers):
+            sums.append(current_sum)
+            continue
+        stack.append((current_sum, index + 1))
+        stack.append((current_sum + numbers[index], index + 1))
+    sums.sort()
+    return sums
+
+
+if __name__ == '__main__':
+    import doctest
+
+    print(doctest.testmod())
@@ -0,0 +1,171 @@
+import random
+from itertools import islice
+from time import perf_counter
+
+import numpy as np
+
+from sums import sorted_subset_sums, sorted_subset_sums_compact
+
+
+def subset_sum_chunks(numbers, chunk_size: int = 65536):
+    """
+
+    Generate all subset sums of the input list of non-negative integers in sorted order, in NumPy chunks.
+
+    Meet in the middle: the numbers are split into two halves, and all subset sums of each half are
+    enumerated into a sorted array. Every subset sum is a pair (left sum, right sum), and the pairs are merged
+    lazily by value windows [lo, hi): for each left sum, np.searchsorted finds the right sums in the window,
+    so the whole window is produced and sorted with array operations instead of one heap operation per sum.
+
+    :param numbers: List of non-negative integers (about 30-45 of them; each half is held in memory).
+    :param chunk_size: The number of sums in each chunk (the last chunk may be shorter).
+    :return: Generator of sorted int64 arrays, whose concatenation is the sorted_subset_sums sequence.
+
+    >>> [chunk.tolist() for chunk in subset_sum_chunks([1, 2, 3], chunk_size=3)]
+    [[0, 1, 2], [3, 3, 4], [5, 6]]
+
+    >>> [chunk.tolist() for chunk in subset_sum_chunks([])]
+    [[0]]
+
+    >>> np.concatenate(list(subset_sum_chunks([0, 0, 5], chunk_size=2))).tolist()
+    [0, 0, 0, 0, 5, 5, 5, 5]
+
+    >>> np.concatenate(list(subset_sum_chunks(range(1, 15), chunk_size=100))).tolist() == list(sorted_subset_sums(range(1, 15)))
+    True
+
+    """
+
+    numbers = sorted(int(number) for number in numbers)
+    if numbers and numbers[0] < 0:
+        raise ValueError("numbers must be non-negative integers.")
+
+    left = _half_sums(numbers[::2])
+    right = _half_sums(numbers[1::2])
+    max_sum = int(left[-1] + right[-1])
+
+    def count_below(bound):
+        # Number of pairs with left + right < bound; only left sums below bound - right[0] can contribute
+        k = np.searchsorted(left, bound - right[0])
+        return int(np.searchsorted(right, bound - left[:k]).sum())
+
+    # Start with a window expected to hold about one chunk, assuming the sums are spread evenly
+    step = max(1, max_sum * chunk_size // (left.size * right.size))
+    lo, below_lo = 0, 0
+    buffer, buffered = [], 0
+
+    while lo <= max_sum:
+        # Find a window end hi holding between `need` and a few chunks of sums: gallop up, then bisect down
+        need = chunk_size - buffered
+        short = lo
+        hi = min(lo + step, max_sum + 1)
+        below_hi = count_below(hi)
+        while below_hi - below_lo < need and hi <= max_sum:
+            short, hi = hi, min(lo + 2 * (hi - lo), max_sum + 1)
+            below_hi = count_below(hi)
+        while below_hi - below_lo > 4 * chunk_size and hi - short > 1:
+            middle = (short + hi) // 2
+            below_middle = count_below(middle)
+            if below_middle - below_lo < need:
+                short = middle
+            else:
+                hi, below_hi = middle, below_middle
+        step = hi - lo
+
+        window = _window_sums(left, right, lo, hi)
+        buffer.append(window)
+        buffered += window.size
+        lo, below_lo = hi, below_hi
+
+        if buffered >= chunk_size or lo > max_sum:
+            pending = np.concatenate(buffer)
+            full = pending.size - pending.size % chunk_size if lo <= max_sum else pending.size
+            for start in range(0, full, chunk_size):
+                yield pending[start:start + chunk_size]
+            buffer, buffered = [pending[full:]], pending.size - full
+
+
+def sorted_subset_sums_mitm(numbers, chunk_size: int = 65536):
+    """
+
+    Generate all subset sums of the input list of non-negative integers in sorted order, as Python ints,
+    from the chunks of subset_sum_chunks.
+
+    >>> list(sorted_subset_sums_mitm([2, 4, 8, 16]))
+    [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30]
+
+    >>> list(islice(sorted_subset_sums_mitm(range(40)), 5))
+    [0, 0, 1, 1, 2]
+
+    """
+
+    for chunk in subset_sum_chunks(numbers, chunk_size):
+        yield from chunk.tolist()
+
+
+def _half_sums(numbers) -> np.ndarray:
+    """
+    Return the sorted array of all 2 ** len(numbers) subset sums of numbers.
+    """
+    sums = np.zeros(1, dtype=np.int64)
+    for number in numbers:
+        sums = np.concatenate((sums, sums + number))
+    sums.sort()
+    return sums
+
+
+def _window_sums(left: np.ndarray, right: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """
+    Return the sorted array of all sums left[i] + right[j] with lo <= sum < hi.
+    """
+    candidates = left[:np.searchsorted(left, hi - right[0])]
+    starts = np.searchsorted(right, lo - candidates)
+    counts = np.searchsorted(right, hi - candidates) - starts
+    total = int(counts.sum())
+
+    # For the pair number p of left sum i, j runs from starts[i]: j = starts[i] + (p - offsets[i])
+    offsets = np.cumsum(counts) - counts
+    rows = np.repeat(np.arange(candidates.size), counts)
+    columns = np.arange(total) - offsets[rows] + starts[rows]
+    sums = candidates[rows] + right[columns]
+    sums.sort()
+    return sums
+
+
+def compare_throughput(n: int = 36, count: int = 2000000, chunk_size: int = 65536):
+    """
+    Compare the throughput (sums per second) of the subset sum generators on the first `count` sums of
+    n random numbers.
+
+    >>> compare_throughput(n=10, count=100)  # doctest: +ELLIPSIS
+    method                        sums/sec
+    sorted_subset_sums            ...
+    sorted_subset_sums_compact    ...
+    sorted_subset_sums_mitm       ...
+    subset_sum_chunks             ...
+    """
+
+    rng = random.Random(n)
+    numbers = [rng.randrange(1, 10 ** 6) for _ in range(n)]
+
+    def chunks_prefix():
+        produced = 0
+        for chunk in subset_sum_chunks(numbers, chunk_size):
+            produced += chunk.size
+            if produced >= count:
+                return
+
+    methods = (("sorted_subset_sums", lambda: sum(1 for _ in islice(sorted_subset_sums(numbers), count))),
+               ("sorted_subset_sums_compact", lambda: sum(1 for _ in islice(sorted_subset_sums_compact(numbers), count))),
+               ("sorted_subset_sums_mitm", lambda: sum(1 for _ in islice(sorted_subset_sums_mitm(numbers, chunk_size), count))),
+               ("subset_sum_chunks", chunks_prefix))
+
+    print(f"{'method':<30}sums/sec")
+    for name, func in methods:
+        start = perf_counter()
+        func()
+        end = perf_counter()
+        print(f"{name:<30}{count / (end - start):.0f}")
+
+
+if __name__ == '__main__':
+    compare_throughput()
@@ -1,6 +1,12 @@
 import heapq
+from itertools import groupby
+from operator import itemgetter
+from typing import Optional
 
+from instrument import instrumented
 
+
+@instrumented()
 def sorted_subset_sums(numbers):
     """
 
@@ -75,6 +81,166 @@ def sorted_subset_sums(numbers):
             heapq.heappush(heap, (new_sum, i + 1))
 
 
+def sorted_subset_sums_compact(numbers):
+    """
+
+    Generate all subset sums of the input list of non-negative numbers in sorted order, like sorted_subset_sums,
+    but push at most two successors per popped sum, so the heap grows with the number of sums yielded
+    instead of with len(numbers).
+
+    Each subset is represented by its sum and the index of its largest element; its successors are the subset
+    extended with the next element and the subset with its largest element replaced by the next element.
+
+    :param numbers: List of non-negative integers.
+    :return: Generator of sorted subset sums.
+
+    >>> from itertools import takewhile, islice
+
+    >>> list(sorted_subset_sums_compact([]))
+    [0]
+
+    >>> list(sorted_subset_sums_compact([1]))
+    [0, 1]
+
+    >>> list(sorted_subset_sums_compact([1,2,3]))
+    [0, 1, 2, 3, 3, 4, 5, 6]
+
+    >>> list(islice(sorted_subset_sums_compact(range(100)),5))
+    [0, 0, 1, 1, 2]
+
+    >>> list(takewhile(lambda x:x<=6, sorted_subset_sums_compact(range(1,100))))
+    [0, 1, 2, 3, 3, 4, 4, 5, 5, 5, 6, 6, 6, 6]
+
+    >>> len(list(takewhile(lambda x : x <= 1000, sorted_subset_sums_compact(list(range(90,100)) + list(range(920,1000))))))
+    1104
+
+    >>> list(sorted_subset_sums_compact([5, 3, 3, 8])) == list(sorted_subset_sums([5, 3, 3, 8]))
+    True
+
+    >>> list(islice(sorted_subset_sums_compact(range(1000000)), 10))
+    [0, 0, 1, 1, 2, 2, 3, 3, 3, 3]
+
+    """
+
+    for current_sum, _ in sorted_subset_states(sorted(numbers), [(0, -1)]):
+        yield current_sum
+
+
+def distinct_subset_sums(numbers, multiplicity: bool = False):
+    """
+
+    Generate the distinct subset sums of the input list of non-negative numbers in ascending order,
+    optionally with the number of subsets that have each sum.
+
+    Uses the successor scheme of sorted_subset_sums_compact, but subsets with the same sum and the same largest
+    element are merged into a single heap entry with a count. The work therefore grows with the number of
+    distinct sums (times len(numbers)) instead of with the number of subsets.
+
+    :param numbers: List of non-negative integers.
+    :param multiplicity: If True, yield (sum, number of subsets with this sum) pairs instead of sums.
+    :return: Generator of distinct sorted subset sums.
+
+    >>> from itertools import takewhile, islice
+
+    >>> list(distinct_subset_sums([]))
+    [0]
+
+    >>> list(distinct_subset_sums([1,2,3]))
+    [0, 1, 2, 3, 4, 5, 6]
+
+    >>> list(distinct_subset_sums([1,2,3], multiplicity=True))
+    [(0, 1), (1, 1), (2, 1), (3, 2), (4, 1), (5, 1), (6, 1)]
+
+    >>> list(islice(distinct_subset_sums(range(100), multiplicity=True), 5))
+    [(0, 2), (1, 2), (2, 2), (3, 4), (4, 4)]
+
+    >>> list(takewhile(lambda x: x[0] <= 6, distinct_subset_sums(range(1,100), multiplicity=True)))
+    [(0, 1), (1, 1), (2, 1), (3, 2), (4, 2), (5, 3), (6, 4)]
+
+    >>> sum(m for s, m in takewhile(lambda x: x[0] <= 1000, distinct_subset_sums(list(range(90,100)) + list(range(920,1000)), multiplicity=True)))
+    1104
+
+    >>> len(list(takewhile(lambda x: x <= 5000, distinct_subset_sums(range(1000)))))
+    5001
+
+    >>> list(distinct_subset_sums([], multiplicity=True))
+    [(0, 1)]
+
+    >>> list(islice(distinct_subset_sums([1] * 1000, multiplicity=True), 3))
+    [(0, 1), (1, 1000), (2, 499500)]
+
+    """
+
+    # Index -1 stands for the empty subset
+    states = sorted_subset_states(sorted(numbers), [(0, -1)], {(0, -1): 1})
+    for current_sum, group in groupby(states, key=itemgetter(0)):
+        if multiplicity:
+            yield current_sum, sum(count for _, count in group)
+        else:
+            yield current_sum
+
+
+def sorted_subset_states(numbers: list, heap: list, counts: Optional[dict] = None):
+    """
+
+    The successor scheme shared by sorted_subset_sums_compact, distinct_subset_sums and
+    subset_jobs.SubsetSumEnumerator.
+
+    A state (current_sum, index) stands for the subsets with that sum whose largest element is numbers[index]
+    (index -1 is the empty subset). The states are popped from the heap in sorted order, and each is replaced by
+    its at most two successors: the subsets extended with the next number, and the subsets with their largest
+    number replaced by the next one. The heap is updated before a state is yielded, so between two items it is
+    the whole state of the enumeration.
+
+    With counts, a dict from every state in the heap to its number of subsets, equal successors are merged into
+    one heap entry. A successor has a larger index than its state, so all of its subsets are merged before it is
+    popped.
+
+    :param numbers: Sorted list of non-negative integers.
+    :param heap: The heap of states to continue from, [(0, -1)] to start; it is updated in place.
+    :param counts: The number of subsets of every state in the heap, to merge equal states; None to keep them apart.
+    :return: Generator of (current_sum, number of subsets) per popped state, in ascending order of sum.
+
+    >>> list(sorted_subset_states([1, 2], [(0, -1)]))
+    [(0, 1), (1, 1), (2, 1), (3, 1)]
+
+    >>> list(sorted_subset_states([1, 1, 1], [(0, -1)], {(0, -1): 1}))
+    [(0, 1), (1, 1), (1, 1), (1, 1), (2, 1), (2, 2), (3, 1)]
+
+    """
+
+    last = len(numbers) - 1
+    while heap:
+        state = heap[0]
+        current_sum, index = state
+        if counts is None:
+            count = 1
+            if index < last:
+                # Replace the state by its successors (heapreplace pops and pushes in one sift)
+                next_number = numbers[index + 1]
+                heapq.heapreplace(heap, (current_sum + next_number, index + 1))
+                if index >= 0:
+                    heapq.heappush(heap, (current_sum - numbers[index] + next_number, index + 1))
+            else:
+                heapq.heappop(heap)
+        else:
+            count = counts.pop(state)
+            heapq.heappop(heap)
+            if index < last:
+                next_number = numbers[index + 1]
+                _merge_state(heap, counts, (current_sum + next_number, index + 1), count)
+                if index >= 0:
+                    _merge_state(heap, counts, (current_sum - numbers[index] + next_number, index + 1), count)
+        yield current_sum, count
+
+
+def _merge_state(heap: list, counts: dict, state: tuple, count: int) -> None:
+    if state in counts:
+        counts[state] += count
+    else:
+        counts[state] = count
+        heapq.heappush(heap, state)
+
 if __name__ == '__main__':
     from itertools import takewhile, islice
 
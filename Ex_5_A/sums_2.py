@@ -1,6 +1,10 @@
 import heapq
+import tracemalloc
+from itertools import islice
 from time import perf_counter
 
+from sums import sorted_subset_sums_compact
+
 
 def sorted_subset_sums(numbers):
     """
@@ -67,6 +71,30 @@ def sorted_subset_sums(numbers):
             heapq.heappush(heap, (new_sum, i + 1))
 
 
+def compare_successor_schemes(n: int = 100000, counts=(1, 10, 25)):
+    """
+    Compare sorted_subset_sums with sorted_subset_sums_compact on range(n): for each k in counts, measure
+    the time and the peak memory it takes to produce the first k sums.
+
+    >>> compare_successor_schemes(n=1000, counts=(5,))  # doctest: +ELLIPSIS
+    k         method                        time (s)   peak memory (KB)
+    5         sorted_subset_sums            ...
+    5         sorted_subset_sums_compact    ...
+    """
+
+    print(f"{'k':<10}{'method':<30}{'time (s)':<11}peak memory (KB)")
+    for k in counts:
+        for func in (sorted_subset_sums, sorted_subset_sums_compact):
+            tracemalloc.start()
+            start = perf_counter()
+            for _ in islice(func(range(n)), k):
+                pass
+            end = perf_counter()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{k:<10}{func.__name__:<30}{end - start:<11.4f}{peak / 1024:.0f}")
+
+
 if __name__ == '__main__':
     from itertools import takewhile, islice
 
@@ -77,3 +105,5 @@ if __name__ == '__main__':
 
     end = perf_counter()
     print(f"\nTime = {end - start} sec")
+
+    compare_successor_schemes()
@@ -0,0 +1,150 @@
+from collections import deque
+from typing import List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+class NegativeCycleError(nx.NetworkXUnbounded):
+    """
+    Raised when a negative cycle is reachable from the source. The cycle attribute lists its nodes, in order,
+    starting and ending with the same node.
+    """
+
+    def __init__(self, cycle: List[str]):
+        super().__init__(f"Negative cycle detected: {cycle}")
+        self.cycle = cycle
+
+
+def spfa(graph: CSRGraph, source: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Single-source shortest paths with negative weights, by queue-based Bellman-Ford relaxation (SPFA).
+
+    Only nodes whose distance improved are put back in the FIFO queue, and the search ends as soon as the queue
+    is empty, instead of always running len(nodes) - 1 rounds over all the edges. A node whose shortest path
+    would have len(nodes) edges proves a negative cycle.
+
+    :return: The array of distances from source (inf for unreachable nodes) and the array of predecessor ids
+             (-1 if none), as in CSRGraph.distances_from.
+    :raises NegativeCycleError: If a negative cycle is reachable from source.
+
+    >>> graph = CSRGraph.from_edges([('A', 'B', 4), ('A', 'C', 2), ('C', 'B', -3), ('B', 'D', 1)])
+    >>> distances, predecessors = spfa(graph, 'A')
+    >>> distances.tolist(), graph.path_to(predecessors, 'A', 'D')
+    ([0.0, -1.0, 2.0, 0.0], ['A', 'C', 'B', 'D'])
+
+    >>> spfa(CSRGraph.from_edges([('A', 'B', 1), ('B', 'C', -2), ('C', 'B', 1)]), 'A')
+    Traceback (most recent call last):
+    bellman_ford_csr.NegativeCycleError: Negative cycle detected: ['C', 'B', 'C']
+    """
+    n = len(graph.labels)
+    offsets, targets, weights = graph.offsets.tolist(), graph.targets.tolist(), graph.weights.tolist()
+    start = graph.index[source]
+
+    distances = [float('inf')] * n
+    predecessors = [-1] * n
+    edges_on_path = [0] * n
+    queued = [False] * n
+    distances[start] = 0.0
+    queue = deque([start])
+    queued[start] = True
+
+    while queue:
+        node = queue.popleft()
+        queued[node] = False
+        node_distance = distances[node]
+        for i in range(offsets[node], offsets[node + 1]):
+            neighbor, new_distance = targets[i], node_distance + weights[i]
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                predecessors[neighbor] = node
+                edges_on_path[neighbor] = edges_on_path[node] + 1
+                if edges_on_path[neighbor] >= n:
+                    raise NegativeCycleError(_cycle(graph, predecessors, neighbor) or [])
+                if not queued[neighbor]:
+                    queued[neighbor] = True
+                    queue.append(neighbor)
+
+    return np.array(distances), np.array(predecessors, dtype=np.int32)
+
+
+def vectorized_bellman_ford(graph: CSRGraph, source: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Single-source shortest paths with negative weights, by Bellman-Ford rounds that relax all the edges at once
+    with NumPy array operations.
+
+    The edges are grouped by target once; every round computes the candidate distance through every edge and
+    takes the minimum per target with np.minimum.reduceat. The rounds stop as soon as no distance improves;
+    an improvement in round len(nodes) proves a negative cycle, which is then found in the predecessor graph.
+
+    :return: The array of distances from source (inf for unreachable nodes) and the array of predecessor ids
+             (-1 if none), as in CSRGraph.distances_from.
+    :raises NegativeCycleError: If a negative cycle is reachable from source.
+
+    >>> graph = CSRGraph.from_edges([('A', 'B', 4), ('A', 'C', 2), ('C', 'B', -3), ('B', 'D', 1)])
+    >>> distances, predecessors = vectorized_bellman_ford(graph, 'A')
+    >>> distances.tolist(), graph.path_to(predecessors, 'A', 'D')
+    ([0.0, -1.0, 2.0, 0.0], ['A', 'C', 'B', 'D'])
+
+    >>> vectorized_bellman_ford(CSRGraph.from_edges([('A', 'B', 1), ('B', 'C', -2), ('C', 'B', 1)]), 'A')
+    Traceback (most recent call last):
+    bellman_ford_csr.NegativeCycleError: Negative cycle detected: ['C', 'B', 'C']
+    """
+    n = len(graph.labels)
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(graph.offsets))
+
+    # Group the edges by target: edges order[starts[k]:starts[k + 1]] all end at heads[k]
+    order = np.argsort(graph.targets, kind='stable')
+    edge_sources, edge_targets, edge_weights = sources[order], graph.targets[order], graph.weights[order]
+    heads, starts = np.unique(edge_targets, return_index=True)
+    group_of_edge = np.repeat(np.arange(heads.size), np.diff(np.append(starts, edge_targets.size)))
+
+    distances = np.full(n, np.inf)
+    predecessors = np.full(n, -1, dtype=np.int32)
+    distances[graph.index[source]] = 0.0
+
+    if heads.size == 0:
+        return distances, predecessors
+
+    for round_number in range(1, 2 * n + 1):
+        candidates = distances[edge_sources] + edge_weights
+        best = np.minimum.reduceat(candidates, starts)
+        improved = best < distances[heads]
+        if not improved.any():
+            return distances, predecessors
+
+        # The first edge of every improved group whose candidate equals the group's minimum
+        tight = np.flatnonzero(improved[group_of_edge] & (candidates == best[group_of_edge]))
+        groups, first = np.unique(group_of_edge[tight], return_index=True)
+        distances[heads[groups]] = best[groups]
+        predecessors[heads[groups]] = edge_sources[tight[first]]
+
+        if round_number >= n:
+            # A negative cycle is reachable; keep relaxing until it shows up in the predecessor graph
+            cycle = _cycle(graph, predecessors.tolist(), int(heads[groups[0]]))
+            if cycle is not None:
+                raise NegativeCycleError(cycle)
+
+    spfa(graph, source)  # Raises NegativeCycleError with the cycle
+    return distances, predecessors
+
+
+def _cycle(graph: CSRGraph, predecessors: list, node: int) -> Optional[List[str]]:
+    """
+    Return the cycle on the predecessor chain of node (a node whose distance is still improving, so that
+    any such cycle is negative), or None if the chain reaches the source.
+    """
+    # If the chain has a cycle, walking back len(nodes) steps is certain to end inside it
+    for _ in range(len(graph.labels)):
+        node = predecessors[node]
+        if node < 0:
+            return None
+    cycle = [node]
+    current = predecessors[node]
+    while current != node:
+        cycle.append(current)
+        current = predecessors[current]
+    cycle.append(node)
+    return [graph.labels[node] for node in reversed(cycle)]
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+
+class CSRGraph:
+    """
+    A directed weighted graph stored as compressed sparse row (CSR) arrays.
+
+    Node labels are interned to the integer ids 0..n-1. The edges leaving node i are
+    targets[offsets[i]:offsets[i + 1]], with the matching weights. Shortest paths are computed by the compiled
+    Dijkstra of scipy.sparse.csgraph directly over these arrays.
+
+    >>> graph = CSRGraph.from_edges([('A', 'B', 1), ('B', 'C', 2), ('A', 'C', 4), ('C', 'D', 1)])
+    >>> graph.labels
+    ['A', 'B', 'C', 'D']
+    >>> graph.offsets.tolist(), graph.targets.tolist(), graph.weights.tolist()
+    ([0, 2, 3, 4, 4], [1, 2, 2, 3], [1.0, 4.0, 2.0, 1.0])
+    >>> graph.shortest_path('A', 'D')
+    (['A', 'B', 'C', 'D'], 4)
+    >>> graph.shortest_path('D', 'A')
+    (None, inf)
+    """
+
+    def __init__(self, labels: List[str], offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                 integer_weights: bool = True, index: Optional[Dict[str, int]] = None):
+        self.labels = labels
+        self.index: Dict[str, int] = index if index is not None else {label: i for i, label in enumerate(labels)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.integer_weights = integer_weights
+        self._matrix = None
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str, float]]) -> "CSRGraph":
+        """
+        Build a CSRGraph from (source, target, weight) edges. As in a networkx DiGraph, when an edge
+        appears more than once, its last weight is kept.
+        """
+        index: Dict[str, int] = {}
+        sources, targets, weights = [], [], []
+        for source, target, weight in edges:
+            sources.append(index.setdefault(source, len(index)))
+            targets.append(index.setdefault(target, len(index)))
+            weights.append(weight)
+        return cls.from_arrays(list(index), np.array(sources, dtype=np.int32), np.array(targets, dtype=np.int32),
+                               np.array(weights), index)
+
+    @classmethod
+    def from_arrays(cls, labels: List[str], sources: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                    index: Optional[Dict[str, int]] = None) -> "CSRGraph":
+        """
+        Build a CSRGraph from parallel arrays of source ids, target ids and weights.
+        """
+        integer_weights = weights.size == 0 or np.issubdtype(weights.dtype, np.integer)
+
+        # Sort the edges by source, then target, then position, and keep the last of every duplicate edge
+        order = np.lexsort((np.arange(sources.size), targets, sources))
+        sources, targets, weights = sources[order], targets[order], weights[order]
+        last = np.ones(sources.size, dtype=bool)
+        last[:-1] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, weights = sources[last], targets[last], weights[last]
+
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(labels)), out=offsets[1:])
+        return cls(labels, offsets, targets.astype(np.int32), weights.astype(np.float64), integer_weights, index)
+
+    @property
+    def matrix(self) -> csr_matrix:
+        """
+        The graph as a scipy CSR matrix sharing the arrays (explicit zero weights are kept as edges).
+        """
+        if self._matrix is None:
+            n = len(self.labels)
+            self._matrix = csr_matrix((self.weights, self.targets, self.offsets), shape=(n, n), copy=False)
+        return self._matrix
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, float]]:
+        """
+        Yield the (source, target, weight) edges, in CSR order.
+        """
+        labels, targets, weights = self.labels, self.targets.tolist(), self.weights.tolist()
+        offsets = self.offsets.tolist()
+        for node in range(len(labels)):
+            source = labels[node]
+            for i in range(offsets[node], offsets[node + 1]):
+                yield source, labels[targets[i]], self.distance_value(weights[i])
+
+    def distances_from(self, source: str, return_predecessors: bool = False):
+        """
+        Run Dijkstra from source over the whole graph.
+
+        :return: The array of distances from source (inf for unreachable nodes), and with return_predecessors,
+                 also the array of the predecessor id of every node on its shortest path (negative if none).
+        """
+        return csgraph_dijkstra(self.matrix, directed=True, indices=self.index[source],
+                                return_predecessors=return_predecessors)
+
+    def path_to(self, predecessors: np.ndarray, source: str, target: str) -> Optional[List[str]]:
+        """
+        Follow the predecessor array of a search from source back from target, and return the path.
+        """
+        node, source_id = self.index[target], self.index[source]
+        path = [node]
+        while node != source_id:
+            node = predecessors[node]
+            if node < 0:
+                return None
+            path.append(node)
+        return [self.labels[node] for node in reversed(path)]
+
+    def distance_value(self, distance: float):
+        """
+        Convert a distance from the search to the type of the weights (int for integer weights).
+        """
+        if self.integer_weights and np.isfinite(distance):
+            return int(distance)
+        return float(distance)
+
+    def shortest_path(self, source: str, target: str) -> Tuple[Optional[List[str]], float]:
+        """
+        Return the shortest path from source to target and its length, or (None, inf) if there is no path.
+        """
+        distances, predecessors = self.distances_from(source, return_predecessors=True)
+        distance = distances[self.index[target]]
+        if not np.isfinite(distance):
+            return None, float('inf')
+        return self.path_to(predecessors, source, target), self.distance_value(distance)
@@ -0,0 +1,223 @@
+"""
+A compact on-disk format for large graphs, which is memory-mapped instead of read into Python objects.
+
+A graph file is a directory holding:
+
+    labels.npy   - the node labels, sorted, as a fixed-width string array; node i is labels[i]
+    offsets.npy  - int32 (int64 from 2 ** 31 edges on), the edges leaving node i are
+                   targets[offsets[i]:offsets[i + 1]] (CSR order)
+    targets.npy  - int32 target node ids
+    weights.npy  - float64 edge weights
+    meta.json    - the format version, the numbers of nodes and edges, and whether the weights are integers
+
+Labels are stored as strings. Since they are sorted, a label is found by binary search in the mapped array,
+so loading builds no label dictionary and no edge tuples: the arrays are only paged in when a search reads them.
+The arrays have the types scipy.sparse.csgraph searches over, so a query uses the mapped arrays as they are,
+without converting them to new arrays first.
+"""
+
+import csv
+import json
+import os
+from array import array
+from collections.abc import Mapping, Sequence
+from time import perf_counter
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+FORMAT_VERSION = 1
+
+Edges = Union[Iterable[Tuple[str, str, float]], dict]
+
+
+def write_graph_file(graph: Edges, path: str) -> None:
+    """
+    Write a graph given as an iterable of (source, target, weight) edges or a dictionary of adjacency lists
+    to a graph file. The edges are streamed into compact arrays, without building an intermediate list.
+    As in a networkx DiGraph, when an edge appears more than once, its last weight is kept.
+
+    >>> import tempfile, os
+    >>> from main import short_path, dijkstra
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = os.path.join(directory, 'graph')
+    ...     write_graph_file({'B': [('A', 1), ('C', 2)], 'C': [('A', 4), ('B', 2)]}, path)
+    ...     graph = load_graph_file(path)
+    ...     graph.labels[0], 'C' in graph.index, graph.shortest_path('C', 'A'), short_path(dijkstra, path, 'B', 'A')
+    ('A', True, (['C', 'B', 'A'], 3), ['B', 'A'])
+    >>> str(graph.offsets.dtype), str(graph.targets.dtype), str(graph.weights.dtype)
+    ('int32', 'int32', 'float64')
+    """
+    builder = _EdgeArrays()
+    for source, target, weight in _iter_edges(graph):
+        builder.add(source, target, weight)
+    builder.save(path)
+
+
+def convert_csv(csv_path: str, path: str, delimiter: str = ',', header: bool = False) -> None:
+    """
+    Convert a CSV file of source, target, weight rows to a graph file, reading it one row at a time.
+
+    :param header: Whether the first row is a header to skip.
+    """
+    builder = _EdgeArrays()
+    with open(csv_path, newline='') as file:
+        rows = csv.reader(file, delimiter=delimiter)
+        if header:
+            next(rows, None)
+        for source, target, weight in rows:
+            builder.add(source, target, weight)
+    builder.save(path)
+
+
+def load_graph_file(path: str) -> CSRGraph:
+    """
+    Memory-map a graph file as a CSRGraph.
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported graph file version {meta['version']}.")
+
+    def mapped(name):
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+    labels = mapped('labels')
+    return CSRGraph(_Labels(labels), mapped('offsets'), mapped('targets'), mapped('weights'),
+                    meta['integer_weights'], _LabelIndex(labels))
+
+
+def _iter_edges(graph: Edges) -> Iterator[Tuple[str, str, float]]:
+    if isinstance(graph, dict):
+        for node, neighbors in graph.items():
+            for neighbor, weight in neighbors:
+                yield node, neighbor, weight
+    else:
+        yield from graph
+
+
+class _EdgeArrays:
+    """
+    Accumulates streamed edges as interned node ids and weights in typed arrays (a few bytes per edge).
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.sources = array('i')
+        self.targets = array('i')
+        self.weights = array('d')
+        self.integer_weights = True
+
+    def add(self, source, target, weight) -> None:
+        index = self.index
+        self.sources.append(index.setdefault(str(source), len(index)))
+        self.targets.append(index.setdefault(str(target), len(index)))
+        weight = float(weight)
+        self.weights.append(weight)
+        if self.integer_weights and not weight.is_integer():
+            self.integer_weights = False
+
+    def save(self, path: str) -> None:
+        # Renumber the nodes in sorted label order, so that labels can be found by binary search
+        labels = np.array(list(self.index), dtype=str)
+        self.index = None
+        order = np.argsort(labels, kind='stable')
+        rank = np.empty(order.size, dtype=np.int32)
+        rank[order] = np.arange(order.size, dtype=np.int32)
+        sources = rank[np.frombuffer(self.sources, dtype=np.int32)]
+        targets = rank[np.frombuffer(self.targets, dtype=np.int32)]
+        weights = np.frombuffer(self.weights, dtype=np.float64)
+        if self.integer_weights:
+            weights = weights.astype(np.int64)
+
+        graph = CSRGraph.from_arrays(labels[order].tolist(), sources, targets, weights, index={})
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'labels.npy'), labels[order])
+        # The index type of csgraph, as long as the number of edges fits in it
+        offsets_type = np.int32 if graph.targets.size < 2 ** 31 else np.int64
+        np.save(os.path.join(path, 'offsets.npy'), graph.offsets.astype(offsets_type))
+        np.save(os.path.join(path, 'targets.npy'), graph.targets.astype(np.int32))
+        np.save(os.path.join(path, 'weights.npy'), graph.weights.astype(np.float64))
+        with open(os.path.join(path, 'meta.json'), 'w') as file:
+            json.dump({'version': FORMAT_VERSION, 'nodes': len(graph.labels), 'edges': int(graph.targets.size),
+                       'integer_weights': bool(graph.integer_weights)}, file)
+
+
+class _Labels(Sequence):
+    """
+    The node labels of a graph file, read from the mapped label array as str.
+    """
+
+    def __init__(self, labels: np.ndarray):
+        self.array = labels
+
+    def __getitem__(self, node):
+        if isinstance(node, slice):
+            return [str(label) for label in self.array[node]]
+        return str(self.array[node])
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+
+class _LabelIndex(Mapping):
+    """
+    The id of every label of a graph file, found by binary search in the sorted mapped label array.
+    """
+
+    def __init__(self, labels: np.ndarray):
+        self.array = labels
+
+    def __getitem__(self, label) -> int:
+        if isinstance(label, str):
+            node = int(np.searchsorted(self.array, label))
+            if node < len(self.array) and self.array[node] == label:
+                return node
+        raise KeyError(label)
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(label) for label in self.array)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+
+def compare_loading(nodes: int = 5 * 10 ** 5, edges: int = 5 * 10 ** 6):
+    """
+    Write a random graph to a graph file, then compare loading it with building the CSR arrays of the same
+    graph from a Python edge list, and time a first query on each. Memory is the peak traced by tracemalloc
+    (mapped pages are not allocations, so they do not count), while loading and during a second query.
+    """
+    import tempfile
+    import tracemalloc
+    from main import create_random_graph, compile_graph, csr_dijkstra
+
+    graph = create_random_graph(nodes, edges)
+    directory = os.path.join(tempfile.mkdtemp(), 'graph')
+    start = perf_counter()
+    write_graph_file(graph, directory)
+    print(f"written in {perf_counter() - start:.1f} sec")
+    source, target = 'N0', f'N{nodes // 2}'
+
+    print(f"{'input':<12}{'load (s)':<10}{'memory (MB)':<14}{'query (s)':<11}{'query memory (MB)':<19}distance")
+    for name, source_graph in (('edge list', graph), ('graph file', directory)):
+        compile_graph.cache_clear()
+        tracemalloc.start()
+        start = perf_counter()
+        compiled = compile_graph(source_graph)
+        compiled.csr
+        loaded = perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = perf_counter()
+        _, distance = csr_dijkstra(compiled, source, target)
+        query = perf_counter() - start
+        tracemalloc.start()
+        csr_dijkstra(compiled, target, source)
+        query_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<12}{loaded:<10.3f}{memory / 2 ** 20:<14.1f}{query:<11.2f}{query_memory / 2 ** 20:<19.1f}"
+              f"{distance}")
@@ -0,0 +1,201 @@
+import heapq
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+from csr_graph import CSRGraph
+
+
+class LandmarkIndex:
+    """
+    Landmark (ALT) preprocessing of a static graph with non-negative weights, for repeated point-to-point queries.
+
+    A few landmark nodes are chosen, and the distances from every landmark to every node and from every node to
+    every landmark are stored. By the triangle inequality, these tables give lower bounds on the distance between
+    any two nodes, which guide a bidirectional A* search towards the target. The search returns the same distances
+    as Dijkstra (and the same route whenever the shortest route is unique), while settling far fewer nodes.
+
+    The index (graph arrays included) can be saved to and loaded from a .npz file.
+
+    >>> graph = CSRGraph.from_edges([('A', 'B', 1), ('A', 'C', 4), ('B', 'A', 1), ('B', 'C', 2), ('B', 'D', 5),
+    ...                              ('C', 'A', 4), ('C', 'B', 2), ('C', 'D', 1), ('D', 'B', 5), ('D', 'C', 1)])
+    >>> index = LandmarkIndex.build(graph, landmarks=2)
+    >>> index.query('A', 'D')
+    (['A', 'B', 'C', 'D'], 4)
+    >>> index.query('D', 'D')
+    (['D'], 0)
+    >>> index.last_settled > 0
+    True
+    """
+
+    def __init__(self, graph: CSRGraph, landmarks: List[int], from_landmarks: np.ndarray, to_landmarks: np.ndarray):
+        """
+        :param graph: The graph.
+        :param landmarks: The ids of the landmark nodes.
+        :param from_landmarks: Array of shape (nodes, landmarks); [v, i] is the distance from landmark i to v.
+        :param to_landmarks: Array of shape (nodes, landmarks); [v, i] is the distance from v to landmark i.
+        """
+        self.graph = graph
+        self.landmarks = landmarks
+        self.from_landmarks = from_landmarks
+        self.to_landmarks = to_landmarks
+        self.last_settled = 0  # The number of nodes settled by the last query
+        self._adjacency = None
+
+    @classmethod
+    def build(cls, graph: CSRGraph, landmarks: int = 8, seed: int = 0) -> "LandmarkIndex":
+        """
+        Choose landmarks by farthest-point selection (each new landmark is the node farthest from the chosen ones,
+        starting from a random node) and compute their distance tables.
+        """
+        n = len(graph.labels)
+        if graph.weights.size and graph.weights.min() < 0:
+            raise ValueError("Landmark search requires non-negative weights.")
+
+        reverse = graph.matrix.transpose().tocsr()
+        chosen, from_rows, to_rows = [], [], []
+        closest = np.full(n, np.inf)
+        candidate = int(np.random.default_rng(seed).integers(n)) if n else 0
+        for _ in range(min(landmarks, n)):
+            chosen.append(candidate)
+            from_rows.append(csgraph_dijkstra(graph.matrix, directed=True, indices=candidate))
+            to_rows.append(csgraph_dijkstra(reverse, directed=True, indices=candidate))
+            # Distance to the nearest landmark, ignoring nodes no landmark reaches
+            closest = np.minimum(closest, from_rows[-1])
+            candidate = int(np.argmax(np.where(np.isfinite(closest), closest, -1)))
+        return cls(graph, chosen, np.array(from_rows).T.copy(), np.array(to_rows).T.copy())
+
+    def save(self, path: str) -> None:
+        np.savez(path, labels=np.array(self.graph.labels, dtype=str), offsets=self.graph.offsets,
+                 targets=self.graph.targets, weights=self.graph.weights,
+                 integer_weights=self.graph.integer_weights, landmarks=np.array(self.landmarks),
+                 from_landmarks=self.from_landmarks, to_landmarks=self.to_landmarks)
+
+    @classmethod
+    def load(cls, path: str) -> "LandmarkIndex":
+        with np.load(path) as data:
+            graph = CSRGraph(data['labels'].tolist(), data['offsets'], data['targets'], data['weights'],
+                             bool(data['integer_weights']))
+            return cls(graph, data['landmarks'].tolist(), data['from_landmarks'], data['to_landmarks'])
+
+    def lower_bounds(self, node: int, source: int, target: int) -> Tuple[float, float]:
+        """
+        Return lower bounds on d(source, node) and d(node, target) from the landmark tables
+        (inf if the tables prove there is no such path).
+        """
+        return self._bounds(self.from_landmarks[node].tolist(), self.to_landmarks[node].tolist(),
+                            self.from_landmarks[source].tolist(), self.to_landmarks[source].tolist(),
+                            self.from_landmarks[target].tolist(), self.to_landmarks[target].tolist())
+
+    @staticmethod
+    def _bounds(from_node, to_node, from_source, to_source, from_target, to_target) -> Tuple[float, float]:
+        # The bounds are at least 0 since the weights are non-negative
+        after_source = before_target = 0.0
+        for i in range(len(from_node)):
+            # d(L, node) <= d(L, source) + d(source, node) and d(source, L) <= d(source, node) + d(node, L)
+            # d(L, target) <= d(L, node) + d(node, target) and d(node, L) <= d(node, target) + d(target, L);
+            # a difference of two infinities (nan) carries no information and fails every comparison
+            for bound in (from_node[i] - from_source[i], to_source[i] - to_node[i]):
+                if bound > after_source:
+                    after_source = bound
+            for bound in (from_target[i] - from_node[i], to_node[i] - to_target[i]):
+                if bound > before_target:
+                    before_target = bound
+        return after_source, before_target
+
+    def query(self, source: str, target: str) -> Tuple[Optional[List[str]], float]:
+        """
+        Find the shortest path from source to target with bidirectional A* using the landmark bounds.
+
+        Both searches use the average potential p(v) = (bound to target - bound from source) / 2, which makes
+        the reduced edge costs of both directions equal and non-negative, so the search can stop as soon as
+        the smallest keys of the two queues add up to the best path found.
+
+        :return: The path and its length, or (None, inf) if there is no path. The number of settled nodes is
+                 stored in last_settled.
+        """
+        graph = self.graph
+        s, t = graph.index[source], graph.index[target]
+        if s == t:
+            self.last_settled = 1
+            return [source], graph.distance_value(0.0)
+
+        forward, backward = self._lists()
+        ends = (self.from_landmarks[s].tolist(), self.to_landmarks[s].tolist(),
+                self.from_landmarks[t].tolist(), self.to_landmarks[t].tolist())
+        potentials = {}
+
+        def potential(node):
+            # Returns the forward potential, or None if the bounds prove node is not on any source-target path
+            if node not in potentials:
+                after_source, before_target = self._bounds(self.from_landmarks[node].tolist(),
+                                                           self.to_landmarks[node].tolist(), *ends)
+                potentials[node] = None if math.isinf(after_source) or math.isinf(before_target) else \
+                    (before_target - after_source) / 2
+            return potentials[node]
+
+        if potential(s) is None or potential(t) is None:
+            self.last_settled = 0
+            return None, float('inf')
+
+        # Per direction: tentative distances, predecessors (towards source / towards target), settled nodes, queue
+        distances = ({s: 0.0}, {t: 0.0})
+        predecessors = ({s: None}, {t: None})
+        settled = (set(), set())
+        queues = ([(potential(s), s)], [(-potential(t), t)])
+        best, meeting = float('inf'), None
+
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            sign = 1 if side == 0 else -1
+            _, node = heapq.heappop(queues[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+
+            offsets, neighbors, weights = (forward, backward)[side]
+            node_distance = distances[side][node]
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor, new_distance = neighbors[i], node_distance + weights[i]
+                if new_distance >= distances[side].get(neighbor, float('inf')):
+                    continue
+                neighbor_potential = potential(neighbor)
+                if neighbor_potential is None:
+                    continue
+                distances[side][neighbor] = new_distance
+                predecessors[side][neighbor] = node
+                heapq.heappush(queues[side], (new_distance + sign * neighbor_potential, neighbor))
+                other_distance = distances[1 - side].get(neighbor)
+                if other_distance is not None and new_distance + other_distance < best:
+                    best, meeting = new_distance + other_distance, neighbor
+
+        self.last_settled = len(settled[0]) + len(settled[1])
+        if meeting is None:
+            return None, float('inf')
+
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = predecessors[0][node]
+        path.reverse()
+        node = predecessors[1][meeting]
+        while node is not None:
+            path.append(node)
+            node = predecessors[1][node]
+        return [graph.labels[node] for node in path], graph.distance_value(best)
+
+    def _lists(self):
+        """
+        The forward and reverse adjacency (offsets, neighbors, weights) as Python lists, for fast indexing.
+        """
+        if self._adjacency is None:
+            graph = self.graph
+            reverse = graph.matrix.transpose().tocsr()
+            self._adjacency = ((graph.offsets.tolist(), graph.targets.tolist(), graph.weights.tolist()),
+                               (reverse.indptr.tolist(), reverse.indices.tolist(), reverse.data.tolist()))
+        return self._adjacency
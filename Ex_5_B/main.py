@@ -1,8 +1,17 @@
-from typing import Callable, Any, Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import repeat
+from time import perf_counter
+from typing import Callable, Any, Dict, List, Optional, Tuple
+import os
+import random
 import output_type as out
 import networkx as nx
 
+from instrument import collect, instrumented, worker
 
+
+@instrumented()
 def short_path(algorithm: Callable, graph: list, source: str, target: str, outputtype: out.OutputType = out.Route()):
     """
     Find the shortest path or distance between two nodes in a graph using a specified algorithm.
@@ -10,14 +19,19 @@ def short_path(algorithm: Callable, graph: list, source: str, target: str, outpu
     :param algorithm: The algorithm to use for finding the shortest path. It should be a function that accepts
                       a graph, source node, and target node, and returns a tuple containing the shortest path
                       and its length.
-    :param graph: The graph represented as a list of edges or a dictionary of adjacency lists.
+    :param graph: The graph represented as a list of edges, a dictionary of adjacency lists, or the path of a
+                  graph file (see graph_file), which is memory-mapped instead of loaded into Python objects.
     :param source: The source node from which to start the path.
     :param target: The target node to which to find the shortest path.
     :param outputtype: The type of output to return, either a list representing the shortest path or the
-                       distance of the shortest path. Defaults to out.Route().
+                       distance of the shortest path. Defaults to out.Route(). Only what the output type needs
+                       is computed: for out.Distance(), no path is tracked.
 
     :return: If outputtype is out.Route(), returns a list representing the shortest path from source to target.
              If outputtype is out.Distance(), returns the distance of the shortest path from source to target.
+             If outputtype is out.StreamingRoute(), returns an iterator over the hops of the shortest path.
+             If outputtype is out.AllDistances() or out.PredecessorTree(), returns the distance or predecessor
+             of every node reachable from source (target is ignored).
 
 
     >>> short_path(algorithm = dijkstra, graph = create_graph(), source = 'A', target = 'D', outputtype=out.Route())
@@ -44,37 +58,455 @@ def short_path(algorithm: Callable, graph: list, source: str, target: str, outpu
     >>> short_path(algorithm = bellman_ford, graph = create_dict_graph(), source = 'A', target = 'D', outputtype=out.Distance())
     4
 
+    >>> short_path(algorithm = dijkstra, graph = compile_graph(create_graph()), source = 'D', target = 'A', outputtype=out.Route())
+    ['D', 'C', 'B', 'A']
+
+    >>> short_path(algorithm = csr_dijkstra, graph = create_graph(), source = 'A', target = 'D', outputtype=out.Route())
+    ['A', 'B', 'C', 'D']
+
+    >>> short_path(algorithm = csr_dijkstra, graph = create_dict_graph(), source = 'A', target = 'D', outputtype=out.Distance())
+    4
+
+    >>> short_path(algorithm = alt_astar, graph = create_graph(), source = 'D', target = 'A', outputtype=out.Route())
+    ['D', 'C', 'B', 'A']
+
+    >>> list(short_path(algorithm = dijkstra, graph = create_graph(), source = 'A', target = 'D', outputtype=out.StreamingRoute()))
+    [('A', 'B'), ('B', 'C'), ('C', 'D')]
+
+    >>> sorted(short_path(algorithm = csr_dijkstra, graph = create_graph(), source = 'A', target = None, outputtype=out.AllDistances()).items())
+    [('A', 0), ('B', 1), ('C', 3), ('D', 4)]
+
+    >>> sorted(short_path(algorithm = bellman_ford, graph = create_graph(), source = 'A', target = None, outputtype=out.PredecessorTree()).items())
+    [('A', None), ('B', 'A'), ('C', 'B'), ('D', 'C')]
+
+    >>> short_path(algorithm = spfa, graph = create_graph() + [('A', 'D', -1)], source = 'B', target = 'D', outputtype=out.Route())
+    ['B', 'A', 'D']
+
+    >>> short_path(algorithm = vectorized_bellman_ford, graph = create_dict_graph(), source = 'A', target = 'D', outputtype=out.Distance())
+    4
+
+    >>> short_path(algorithm = spfa, graph = [('A', 'B', 1), ('B', 'C', -2), ('C', 'B', 1)], source = 'A', target = 'C')
+    Traceback (most recent call last):
+    bellman_ford_csr.NegativeCycleError: Negative cycle detected: ['C', 'B', 'C']
+
     """
-    if isinstance(graph, dict):
-        graph = transform_graph_dict_to_list(graph)
+    graph = compile_graph(graph)
+
+    if outputtype.single_source:
+        tree = _source_tree(algorithm, graph, source, outputtype.needs_path)
+        return outputtype.get_output(tree.predecessors() if outputtype.needs_path else None, tree.distances())
+
+    distance_only = None if outputtype.needs_path else _DISTANCE_ONLY.get(algorithm)
+    if distance_only is not None:
+        return outputtype.get_output(None, distance_only(graph, source, target))
 
     path, distance = algorithm(graph, source, target)
 
     return outputtype.get_output(path, distance)
 
 
+@instrumented()
+def short_paths(algorithm: Callable, graph: list, queries: List[Tuple[str, str]],
+                outputtype: out.OutputType = out.Route(), workers: int = 1) -> list:
+    """
+    Answer many (source, target) shortest-path queries on the same graph.
+
+    Queries are grouped by source, and one shortest-path tree is computed per distinct source and used for all
+    of its targets. With workers > 1, the distinct sources are spread across a process pool (the graph is sent
+    to each worker once). The results are returned in the order of the queries.
+
+    For dijkstra, bellman_ford and csr_dijkstra, an unreachable target gives outputtype.get_output(None, inf)
+    instead of an exception, so one such query does not fail the whole batch. Other algorithms are called once
+    per query, as in short_path.
+
+    :param algorithm: The algorithm, as in short_path.
+    :param graph: The graph, as in short_path.
+    :param queries: The (source, target) pairs.
+    :param outputtype: The type of output to return for each query, as in short_path.
+    :param workers: The number of worker processes; 1 answers the queries in this process.
+    :return: The list of outputs, one per query.
+
+    >>> short_paths(dijkstra, create_graph(), [('A', 'D'), ('B', 'C'), ('A', 'C')], out.Distance())
+    [4, 2, 3]
+
+    >>> short_paths(bellman_ford, create_dict_graph(), [('D', 'A'), ('A', 'D')], out.Route(), workers=2)
+    [['D', 'C', 'B', 'A'], ['A', 'B', 'C', 'D']]
+
+    >>> short_paths(csr_dijkstra, create_graph() + [('E', 'A', 1)], [('A', 'E'), ('E', 'D')], out.Distance())
+    [inf, 5]
+
+    >>> first, second = short_paths(dijkstra, create_graph(), [('A', 'B'), ('A', 'C')], out.AllDistances())
+    >>> first == second, first is second
+    (True, False)
+    """
+    graph = compile_graph(graph)
+
+    # Query indices by source, in order of first appearance
+    by_source: Dict[str, List[int]] = {}
+    for i, (source, target) in enumerate(queries):
+        by_source.setdefault(source, []).append(i)
+    sources = list(by_source)
+    targets = [[queries[i][1] for i in by_source[source]] for source in sources]
+
+    if workers == 1:
+        answers = map(_answer_source, repeat(algorithm), repeat(graph), sources, targets, repeat(outputtype))
+        answers = list(answers)
+    else:
+        # A graph file is sent by path, and mapped again by each worker
+        initargs = (graph.path if graph.path is not None else graph.edges,)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            answers = list(map(collect, pool.map(worker(_answer_source), repeat(algorithm), repeat(None), sources,
+                                                 targets, repeat(outputtype))))
+
+    results = [None] * len(queries)
+    for source, outputs in zip(sources, answers):
+        for i, output in zip(by_source[source], outputs):
+            results[i] = output
+    return results
+
+
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = compile_graph(graph) if isinstance(graph, str) else CompiledGraph(graph)
+
+
+def _answer_source(algorithm, graph, source, targets, outputtype) -> list:
+    """
+    Answer all the queries from one source, from a single shortest-path tree when the algorithm has one.
+    """
+    graph = graph if graph is not None else _worker_graph
+    if algorithm not in _SOURCE_TREES and not outputtype.single_source:
+        return [short_path(algorithm, graph, source, target, outputtype) for target in targets]
+
+    tree = _source_tree(algorithm, graph, source, outputtype.needs_path)
+    if outputtype.single_source:
+        # One output per query (the maps are built again for each), so the results never share a dict
+        return [outputtype.get_output(tree.predecessors() if outputtype.needs_path else None, tree.distances())
+                for _ in targets]
+
+    outputs = []
+    for target in targets:
+        distance = tree.distance(target)
+        path = tree.path(target) if outputtype.needs_path and distance != float('inf') else None
+        outputs.append(outputtype.get_output(path, distance))
+    return outputs
+
+
+def _source_tree(algorithm, graph, source, with_predecessors: bool):
+    """
+    Compute the shortest-path tree of a source with the algorithm (predecessors are only tracked if needed).
+    """
+    if algorithm not in _SOURCE_TREES:
+        raise ValueError(f"{algorithm.__name__} does not support single-source outputs.")
+    return _SOURCE_TREES[algorithm](graph, source, with_predecessors)
+
+
+class _NetworkxTree:
+    """
+    The shortest-path tree of a source computed by networkx: with predecessors by a *_predecessor_and_distance
+    function, or only the distances by a single_source_*_path_length function.
+    """
+
+    def __init__(self, graph, source, with_predecessors: bool, predecessor_and_distance: Callable,
+                 path_length: Callable):
+        G = compile_graph(graph).digraph
+        self.source = source
+        if with_predecessors:
+            self._predecessors, self._distances = predecessor_and_distance(G, source, weight='weight')
+        else:
+            self._predecessors, self._distances = None, path_length(G, source, weight='weight')
+
+    def distance(self, target):
+        return self._distances.get(target, float('inf'))
+
+    def path(self, target):
+        # The first predecessor is the one the single-target search would have used
+        path = [target]
+        while path[-1] != self.source:
+            path.append(self._predecessors[path[-1]][0])
+        return path[::-1]
+
+    def distances(self) -> dict:
+        return dict(self._distances)
+
+    def predecessors(self) -> dict:
+        return {node: predecessors[0] if predecessors else None for node, predecessors in self._predecessors.items()}
+
+
+class _CSRTree:
+    """
+    The shortest-path tree of a source computed over the CSR arrays of the graph.
+    """
+
+    def __init__(self, graph, source, with_predecessors: bool, search: str = 'dijkstra'):
+        """
+        :param search: 'dijkstra', or the name of a search of bellman_ford_csr for negative weights
+                       ('spfa' or 'vectorized_bellman_ford'), which always returns the predecessors.
+        """
+        self.csr = compile_graph(graph).csr
+        if source not in self.csr.index:
+            raise nx.NodeNotFound(f"Node {source} not found in graph")
+        self.source = source
+        if search != 'dijkstra':
+            import bellman_ford_csr
+            self._distances, self._predecessors = getattr(bellman_ford_csr, search)(self.csr, source)
+        elif with_predecessors:
+            self._distances, self._predecessors = self.csr.distances_from(source, return_predecessors=True)
+        else:
+            self._distances, self._predecessors = self.csr.distances_from(source), None
+
+    def distance(self, target):
+        if target not in self.csr.index:
+            return float('inf')
+        return self.csr.distance_value(self._distances[self.csr.index[target]])
+
+    def path(self, target):
+        return self.csr.path_to(self._predecessors, self.source, target)
+
+    def _reached(self) -> list:
+        return [node for node, distance in enumerate(self._distances.tolist()) if distance != float('inf')]
+
+    def distances(self) -> dict:
+        labels = self.csr.labels
+        return {labels[node]: self.csr.distance_value(self._distances[node]) for node in self._reached()}
+
+    def predecessors(self) -> dict:
+        labels, predecessors = self.csr.labels, self._predecessors.tolist()
+        return {labels[node]: labels[predecessors[node]] if predecessors[node] >= 0 else None
+                for node in self._reached()}
+
+
+def _dijkstra_distance(graph, source, target):
+    return nx.dijkstra_path_length(compile_graph(graph).digraph, source, target, weight='weight')
+
+
+def _bellman_ford_distance(graph, source, target):
+    try:
+        return nx.bellman_ford_path_length(compile_graph(graph).digraph, source, target, weight='weight')
+    except nx.NetworkXNoPath:
+        return float('inf')
+
+
+def _csr_distance(graph, source, target):
+    distance = _CSRTree(graph, source, with_predecessors=False).distance(target)
+    if distance == float('inf'):
+        raise nx.NetworkXNoPath(f"No path to {target}.")
+    return distance
+
+
+def _csr_bellman_ford_distance(graph, source, target, search: str):
+    return _CSRTree(graph, source, with_predecessors=False, search=search).distance(target)
+
+
 def dijkstra(graph, source, target):
-    G = nx.DiGraph()
-    G.add_weighted_edges_from(graph)
+    G = compile_graph(graph).digraph
 
-    shortest_path = nx.dijkstra_path(G, source=source, target=target, weight='weight')
-    path_length = nx.dijkstra_path_length(G, source=source, target=target, weight='weight')
+    # One search computes both the distance and the path
+    path_length, shortest_path = nx.single_source_dijkstra(G, source=source, target=target, weight='weight')
 
     return shortest_path, path_length
 
 
 def bellman_ford(graph, source, target):
-    G = nx.DiGraph()
-    G.add_weighted_edges_from(graph)
+    G = compile_graph(graph).digraph
 
     try:
-        path = nx.bellman_ford_path(G, source=source, target=target, weight='weight')
-        path_length = nx.bellman_ford_path_length(G, source=source, target=target, weight='weight')
+        path_length, path = nx.single_source_bellman_ford(G, source=source, target=target, weight='weight')
         return path, path_length
     except nx.NetworkXNoPath:
         return None, float('inf')
 
 
+def spfa(graph, source, target):
+    """
+    Bellman-Ford over the CSR arrays of the graph by queue-based relaxation (see bellman_ford_csr.spfa), which
+    only revisits the nodes whose distance improved and stops as soon as no distance improves.
+    Like bellman_ford, returns (None, inf) if there is no path; a negative cycle reachable from source raises
+    bellman_ford_csr.NegativeCycleError (a networkx.NetworkXUnbounded) with the cycle.
+    """
+    return _csr_bellman_ford(graph, source, target, 'spfa')
+
+
+def vectorized_bellman_ford(graph, source, target):
+    """
+    Bellman-Ford over the CSR arrays of the graph, relaxing all the edges in every round with NumPy array
+    operations (see bellman_ford_csr.vectorized_bellman_ford). Same results and errors as spfa; faster when
+    the shortest paths have few edges, as in dense graphs.
+    """
+    return _csr_bellman_ford(graph, source, target, 'vectorized_bellman_ford')
+
+
+def _csr_bellman_ford(graph, source, target, search: str):
+    tree = _CSRTree(graph, source, with_predecessors=True, search=search)
+    distance = tree.distance(target)
+    if distance == float('inf'):
+        return None, distance
+    return tree.path(target), distance
+
+
+def csr_dijkstra(graph, source, target):
+    """
+    Dijkstra over the compact CSR arrays of the graph (see csr_graph.CSRGraph) instead of a networkx DiGraph.
+    Returns the same distances as dijkstra and raises the same errors; when there are several shortest paths,
+    it may return a different one.
+    """
+    csr = compile_graph(graph).csr
+    if source not in csr.index:
+        raise nx.NodeNotFound(f"Node {source} not found in graph")
+    if target not in csr.index:
+        raise nx.NetworkXNoPath(f"No path to {target}.")
+
+    path, path_length = csr.shortest_path(source, target)
+    if path is None:
+        raise nx.NetworkXNoPath(f"No path to {target}.")
+    return path, path_length
+
+
+def alt_astar(graph, source, target):
+    """
+    Bidirectional A* guided by a landmark index (see landmarks.LandmarkIndex), for repeated queries on a static
+    graph with non-negative weights. Returns the same distances as dijkstra, settling far fewer nodes.
+
+    The index is built with default settings on the first query of a graph, and kept with it when the graph is
+    passed as a CompiledGraph (see compile_graph), unless one was assigned to it: compiled.landmarks =
+    LandmarkIndex.load(path). The number of nodes settled by the last query is compiled.landmarks.last_settled.
+    """
+    index = compile_graph(graph).landmarks
+    if source not in index.graph.index:
+        raise nx.NodeNotFound(f"Node {source} not found in graph")
+    if target not in index.graph.index:
+        raise nx.NetworkXNoPath(f"No path to {target}.")
+
+    path, path_length = index.query(source, target)
+    if path is None:
+        raise nx.NetworkXNoPath(f"No path to {target}.")
+    return path, path_length
+
+
+# Algorithms that can compute the whole shortest-path tree of a source, used by short_paths for all the queries
+# from a source and by the single-source output types
+_SOURCE_TREES = {
+    dijkstra: partial(_NetworkxTree, predecessor_and_distance=nx.dijkstra_predecessor_and_distance,
+                      path_length=nx.single_source_dijkstra_path_length),
+    bellman_ford: partial(_NetworkxTree, predecessor_and_distance=nx.bellman_ford_predecessor_and_distance,
+                          path_length=nx.single_source_bellman_ford_path_length),
+    csr_dijkstra: _CSRTree,
+    spfa: partial(_CSRTree, search='spfa'),
+    vectorized_bellman_ford: partial(_CSRTree, search='vectorized_bellman_ford'),
+}
+
+# Algorithms that can compute a distance without tracking the path, for output types that do not need the path
+_DISTANCE_ONLY = {
+    dijkstra: _dijkstra_distance,
+    bellman_ford: _bellman_ford_distance,
+    csr_dijkstra: _csr_distance,
+    spfa: partial(_csr_bellman_ford_distance, search='spfa'),
+    vectorized_bellman_ford: partial(_csr_bellman_ford_distance, search='vectorized_bellman_ford'),
+}
+
+
+class CompiledGraph:
+    """
+    A graph prepared once for repeated shortest-path queries.
+
+    It holds the edge list and builds the networkx DiGraph and the CSR arrays on first use. Iterating over it yields the edges,
+    so algorithms that expect an edge list accept a CompiledGraph too.
+
+    A graph loaded from a graph file starts from its mapped CSR arrays instead, and only builds the edge list
+    if an algorithm needs it (as the networkx ones do).
+    """
+
+    def __init__(self, edges: Optional[List[Tuple[str, str, int]]] = None, csr=None, path: Optional[str] = None):
+        self._edges = edges
+        self._digraph = None
+        self._csr = csr
+        self._landmarks = None
+        self.path = path  # The graph file the graph was loaded from, if any
+
+    def __iter__(self):
+        return iter(self.edges)
+
+    def __len__(self) -> int:
+        return len(self._edges) if self._edges is not None else int(self._csr.targets.size)
+
+    @property
+    def edges(self) -> List[Tuple[str, str, int]]:
+        if self._edges is None:
+            self._edges = list(self._csr.iter_edges())
+        return self._edges
+
+    @property
+    def digraph(self) -> nx.DiGraph:
+        if self._digraph is None:
+            self._digraph = nx.DiGraph()
+            self._digraph.add_weighted_edges_from(self.edges)
+        return self._digraph
+
+    @property
+    def csr(self):
+        if self._csr is None:
+            from csr_graph import CSRGraph
+            self._csr = CSRGraph.from_edges(self.edges)
+        return self._csr
+
+    @property
+    def landmarks(self):
+        if self._landmarks is None:
+            from landmarks import LandmarkIndex
+            self._landmarks = LandmarkIndex.build(self.csr)
+        return self._landmarks
+
+    @landmarks.setter
+    def landmarks(self, index):
+        self._landmarks = index
+
+
+def compile_graph(graph) -> CompiledGraph:
+    """
+    Return the CompiledGraph of a graph given as a list of edges, a dictionary of adjacency lists,
+    the path of a graph file, or an already compiled graph.
+
+    A list or dictionary is compiled again on every call, so a graph edited in place is always searched as it
+    is now. To reuse the compiled structures across queries, keep the CompiledGraph and pass it instead of the
+    edges: it holds its own copy of the edge list, so later edits of the input do not change it. Graph files
+    are cached by path and modification time.
+
+    >>> graph = create_graph()
+    >>> compiled = compile_graph(graph)
+    >>> compile_graph(compiled) is compiled, compile_graph(graph) is compiled
+    (True, False)
+
+    >>> graph[4] = ('B', 'D', 1)
+    >>> short_path(dijkstra, graph, 'A', 'D', out.Distance()), short_path(dijkstra, compiled, 'A', 'D', out.Distance())
+    (2, 4)
+
+    >>> graph = create_dict_graph()
+    >>> graph['A'].append(('D', 1))
+    >>> short_path(csr_dijkstra, graph, 'A', 'D', out.Distance())
+    1
+    """
+    if isinstance(graph, CompiledGraph):
+        return graph
+    if isinstance(graph, (str, os.PathLike)):
+        path = os.fspath(graph)
+        return _compile_file(path, os.stat(os.path.join(path, 'meta.json')).st_mtime_ns)
+    if isinstance(graph, dict):
+        graph = transform_graph_dict_to_list(graph)
+    return CompiledGraph([tuple(edge) for edge in graph])
+
+
+@lru_cache(maxsize=8)
+def _compile_file(path: str, modified: int) -> CompiledGraph:
+    from graph_file import load_graph_file
+    return CompiledGraph(csr=load_graph_file(path), path=path)
+
+
+compile_graph.cache_clear = _compile_file.cache_clear
+
+
 
 Graph = Dict[str, List[Tuple[str, int]]]
 
@@ -94,6 +526,31 @@ def create_graph() -> list[tuple[str, str, int]]:
     ]
 
 
+def create_random_graph(nodes: int, edges: int, seed: int = 0, max_weight: int = 100) -> list[tuple[str, str, int]]:
+    """
+    Return a random directed graph with string node labels 'N0', 'N1', ..., as a list of weighted edges.
+    A cycle through all the nodes is included, so every node is reachable from every other node.
+    """
+    rng = random.Random(seed)
+    graph = [(f'N{i}', f'N{(i + 1) % nodes}', rng.randint(1, max_weight)) for i in range(nodes)]
+    graph += [(f'N{rng.randrange(nodes)}', f'N{rng.randrange(nodes)}', rng.randint(1, max_weight))
+              for _ in range(edges - nodes)]
+    return graph
+
+
+def create_random_negative_graph(nodes: int, edges: int, seed: int = 0,
+                                 max_weight: int = 100) -> list[tuple[str, str, int]]:
+    """
+    Return a random graph as create_random_graph, with some negative weights but no negative cycle.
+    Every edge (u, v, w) is reweighted to w + p(u) - p(v) for random node potentials p, which leaves the length
+    of every cycle unchanged, and so non-negative.
+    """
+    rng = random.Random(seed)
+    potentials = {f'N{i}': rng.randint(0, max_weight) for i in range(nodes)}
+    graph = create_random_graph(nodes, edges, seed, max_weight)
+    return [(u, v, w + potentials[u] - potentials[v]) for u, v, w in graph]
+
+
 def create_dict_graph() -> Graph:
     return {
         'A': [('B', 1), ('C', 4)],
@@ -111,6 +568,112 @@ def transform_graph_dict_to_list(graph: Dict[str, List[Tuple[str, int]]]) -> Lis
     return edge_list
 
 
+def compare_query_latency(nodes: int = 2000, edges: int = 10000, queries: int = 50):
+    """
+    Measure the average latency of repeated short_path queries on one random graph, for each algorithm,
+    given the edge list (compiled for every query) and given the CompiledGraph of the edge list.
+    """
+    graph = create_random_graph(nodes, edges)
+    compiled = compile_graph(graph)
+    rng = random.Random(1)
+    pairs = [(f'N{rng.randrange(nodes)}', f'N{rng.randrange(nodes)}') for _ in range(queries)]
+
+    print(f"{'algorithm':<15}{'edges (ms)':<12}compiled (ms)")
+    for algorithm in (dijkstra, bellman_ford):
+        start = perf_counter()
+        for source, target in pairs:
+            short_path(algorithm, graph, source, target, out.Distance())
+        cold = (perf_counter() - start) / queries
+        start = perf_counter()
+        for source, target in pairs:
+            short_path(algorithm, compiled, source, target, out.Distance())
+        cached = (perf_counter() - start) / queries
+        print(f"{algorithm.__name__:<15}{cold * 1000:<12.2f}{cached * 1000:.2f}")
+
+
+def compare_csr_with_networkx(sizes=(10 ** 4, 10 ** 5, 10 ** 6), queries: int = 5):
+    """
+    Compare csr_dijkstra with dijkstra on random graphs with 10 edges per node: the time to build the graph
+    structure, its peak memory during the build, and the average query time.
+    """
+    import tracemalloc
+
+    print(f"{'edges':<10}{'algorithm':<15}{'build (s)':<12}{'memory (MB)':<14}query (ms)")
+    for size in sizes:
+        nodes = size // 10
+        graph = create_random_graph(nodes, size)
+        rng = random.Random(size)
+        pairs = [(f'N{rng.randrange(nodes)}', f'N{rng.randrange(nodes)}') for _ in range(queries)]
+        for algorithm, structure in ((dijkstra, 'digraph'), (csr_dijkstra, 'csr')):
+            compiled = CompiledGraph(graph)
+            tracemalloc.start()
+            start = perf_counter()
+            getattr(compiled, structure)
+            build = perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            start = perf_counter()
+            for source, target in pairs:
+                algorithm(compiled, source, target)
+            query = (perf_counter() - start) / queries
+            print(f"{size:<10}{algorithm.__name__:<15}{build:<12.3f}{memory / 2 ** 20:<14.1f}{query * 1000:.1f}")
+
+
+def compare_alt_with_dijkstra(nodes: int = 100000, edges: int = 400000, queries: int = 20):
+    """
+    Compare alt_astar with dijkstra on random queries: check that the distances are equal, and print the average
+    number of settled nodes and query time of each. Dijkstra (stopping at the target) settles every node closer
+    to the source than the target, which is counted from a full csgraph search.
+    """
+    graph = CompiledGraph(create_random_graph(nodes, edges))
+    start = perf_counter()
+    index = graph.landmarks
+    print(f"landmark index built in {perf_counter() - start:.2f} sec")
+
+    rng = random.Random(2)
+    pairs = [(f'N{rng.randrange(nodes)}', f'N{rng.randrange(nodes)}') for _ in range(queries)]
+    dijkstra_time = alt_time = dijkstra_settled = alt_settled = 0
+    for source, target in pairs:
+        start = perf_counter()
+        _, expected = dijkstra(graph, source, target)
+        dijkstra_time += perf_counter() - start
+        distances = graph.csr.distances_from(source)
+        dijkstra_settled += int((distances < expected).sum()) + 1
+
+        start = perf_counter()
+        _, distance = alt_astar(graph, source, target)
+        alt_time += perf_counter() - start
+        alt_settled += index.last_settled
+        assert distance == expected, (source, target, distance, expected)
+
+    print(f"{'algorithm':<12}{'settled':<12}query (ms)")
+    print(f"{'dijkstra':<12}{dijkstra_settled / queries:<12.0f}{dijkstra_time / queries * 1000:.1f}")
+    print(f"{'alt_astar':<12}{alt_settled / queries:<12.0f}{alt_time / queries * 1000:.1f}")
+
+
+def compare_bellman_ford(sizes=((10000, 50000), (1000, 100000)), sources: int = 3):
+    """
+    Compare bellman_ford (networkx), spfa and vectorized_bellman_ford on random graphs with negative weights,
+    a sparse and a dense one by default: check that the distances from a few sources are equal, and print
+    the average time of a full single-source search, including building each graph structure once.
+    """
+    print(f"{'nodes':<8}{'edges':<10}{'algorithm':<26}time (ms)")
+    for nodes, edges in sizes:
+        graph = create_random_negative_graph(nodes, edges)
+        rng = random.Random(nodes + edges)
+        starts = [f'N{rng.randrange(nodes)}' for _ in range(sources)]
+        expected = None
+        for algorithm in (bellman_ford, spfa, vectorized_bellman_ford):
+            compiled = CompiledGraph(graph)
+            start = perf_counter()
+            results = [short_path(algorithm, compiled, source, None, out.AllDistances()) for source in starts]
+            elapsed = (perf_counter() - start) / sources
+            if expected is None:
+                expected = results
+            assert results == expected, algorithm.__name__
+            print(f"{nodes:<8}{edges:<10}{algorithm.__name__:<26}{elapsed * 1000:.1f}")
+
+
 if __name__ == '__main__':
     import doctest
 
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 class OutputType(ABC):
+    """
+    The output of a shortest-path query. The class attributes declare what the output needs, so that
+    short_path only computes that:
+
+    needs_path: whether the search has to track predecessors and build a path.
+    single_source: whether the output describes the whole search from the source (the target is ignored);
+                   then get_output receives the predecessor map (None if not needed) and the distance map
+                   instead of a path and a distance.
+    """
+    needs_path = True
+    single_source = False
+
     @abstractmethod
     def get_output(self, path: List[str], distance: int) -> Any:
         pass
@@ -13,5 +25,52 @@ class Route(OutputType):
 
 
 class Distance(OutputType):
+    needs_path = False
+
     def get_output(self, path: List[str], distance: int) -> int:
         return distance
+
+
+class StreamingRoute(Route):
+    """
+    The route as an iterator of hops (node, next node), instead of a list of nodes.
+
+    This is a convenience for consumers that work hop by hop. The search still builds the whole path as a
+    list first (the predecessors lead from the target back to the source), so it saves no time or memory
+    over Route.
+    """
+
+    def get_output(self, path: List[str], distance: int) -> Optional[Iterator[Tuple[str, str]]]:
+        if path is None:
+            return None
+        return _hops(path)
+
+
+class AllDistances(OutputType):
+    """
+    The distances from the source to every node it reaches.
+    """
+    needs_path = False
+    single_source = True
+
+    def get_output(self, predecessors: Optional[Dict[str, str]], distances: Dict[str, int]) -> Dict[str, int]:
+        return distances
+
+
+class PredecessorTree(OutputType):
+    """
+    The shortest-path tree from the source, as a map from every node it reaches to its predecessor
+    (None for the source).
+    """
+    single_source = True
+
+    def get_output(self, predecessors: Dict[str, str], distances: Dict[str, int]) -> Dict[str, str]:
+        return predecessors
+
+
+def _hops(path) -> Iterator[Tuple[str, str]]:
+    iterator = iter(path)
+    previous = next(iterator, None)
+    for node in iterator:
+        yield previous, node
+        previous = node
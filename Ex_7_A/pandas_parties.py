@@ -1,5 +1,7 @@
 import pandas as pd
 
+from instrument import instrumented
+
 codes_for_questions = pd.read_csv(
     "https://raw.githubusercontent.com/erelsgl-at-ariel/research-5784/main/06-python-databases/homework/codes_for_questions.csv")
 codes_for_answers = pd.read_csv(
@@ -8,6 +10,7 @@ list_of_answers = pd.read_csv(
     "https://raw.githubusercontent.com/erelsgl-at-ariel/research-5784/main/06-python-databases/homework/list_of_answers.csv")
 
 
+@instrumented()
 def support_in_one_party_elections(party: str) -> int:
     """
     Calculate the number of supporters for a given party in one-party elections.
@@ -47,6 +50,7 @@ def support_in_one_party_elections(party: str) -> int:
     return num_supporters
 
 
+@instrumented()
 def support_in_multi_party_elections(party: str) -> int:
     """
     Calculate the number of supporters for a given party in multi-party elections.
@@ -87,6 +91,7 @@ def support_in_multi_party_elections(party: str) -> int:
     return num_supporters
 
 
+@instrumented()
 def parties_with_different_relative_order() -> tuple:
     """
     Find parties with different relative order of support in one-party and multi-party elections.
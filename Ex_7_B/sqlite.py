@@ -1,6 +1,8 @@
 import requests
 import sqlite3
 
+from instrument import instrumented
+
 with open("poll.db", "wb") as file:
     response = requests.get(
         "https://github.com/erelsgl-at-ariel/research-5784/raw/main/06-python-databases/homework/poll.db")
@@ -9,6 +11,7 @@ with open("poll.db", "wb") as file:
 db = sqlite3.connect("poll.db")
 
 
+@instrumented()
 def net_support_for_candidate1(candidate1: str, candidate2: str) -> int:
     """
     Calculate the net support for candidate1 over candidate2.
@@ -66,6 +69,7 @@ def net_support_for_candidate1(candidate1: str, candidate2: str) -> int:
     return db.execute(query).fetchone()[0]
 
 
+@instrumented()
 def condorcet_winner() -> str:
     """
     Find the Condorcet winner among the candidates.
@@ -0,0 +1,338 @@
+"""
+Instrumentation of the hot paths of the exercises: call counts, wall time and, optionally, peak memory,
+per labeled function or block.
+
+Instrumentation is off by default, and an instrumented function then costs one flag check per call.
+Turn it on with enable(), or before starting Python with the INSTRUMENT environment variable:
+
+    INSTRUMENT=1        count calls and time them
+    INSTRUMENT=memory   also trace the peak memory of every call with tracemalloc (which slows allocations)
+    INSTRUMENT_OUTPUT   a .json file to dump the statistics to at exit (printed as a table when not set)
+
+Work run by a process pool is recorded in the worker processes, which the statistics of this process do not
+see. A pool that runs a function through worker() gets each result together with the statistics recorded
+for it, and collect() adds those here, as canonicalize_stream, short_paths and mincover do. Other pools
+(such as the one of sharded_subset_sums, which runs no instrumented code) are not recorded.
+
+The exercise modules import this file by its plain name, and do not change sys.path themselves, so the
+repository root has to be on the path when they are used. From an exercise directory, for example:
+
+    PYTHONPATH=.. python -m doctest main.py
+"""
+
+import atexit
+import contextlib
+import functools
+import inspect
+import json
+import os
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+
+class Stats:
+    """
+    The aggregated measurements of one label.
+    """
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'peak_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.peak_bytes = None  # The largest peak of a single call, when memory is traced
+
+    def as_dict(self) -> dict:
+        return {'calls': self.calls, 'seconds': self.seconds, 'max_seconds': self.max_seconds,
+                'mean_seconds': self.seconds / self.calls if self.calls else 0.0, 'peak_bytes': self.peak_bytes}
+
+
+class _State:
+    enabled = False
+    memory = False
+
+
+_state = _State()
+_stats: Dict[str, Stats] = {}
+_active: Dict[str, int] = {}  # label -> depth of the calls in progress
+_memory_frames = []  # [traced memory at start, highest peak of the nested measurements] per measurement
+
+
+def enable(memory: bool = False) -> None:
+    """
+    Start recording. With memory=True, tracemalloc is started too, and the peak memory of every call is recorded.
+    """
+    _state.enabled = True
+    _state.memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    """
+    Stop recording. The statistics recorded so far are kept.
+    """
+    _state.enabled = False
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def reset() -> None:
+    """
+    Drop the recorded statistics.
+    """
+    _stats.clear()
+
+
+def measure(func: Callable, *args, **kwargs):
+    """
+    Call a function and time it.
+
+    :return: The result of the function, and the time it took in seconds.
+
+    >>> result, seconds = measure(sorted, [3, 1, 2])
+    >>> result, seconds < 1
+    ([1, 2, 3], True)
+    """
+    start = perf_counter()
+    result = func(*args, **kwargs)
+    return result, perf_counter() - start
+
+
+def instrumented(label: Optional[str] = None) -> Callable:
+    """
+    A decorator that records the calls of a function under a label (its qualified name by default).
+
+    Recursive and re-entrant calls are part of the outermost call, so they are neither counted nor timed again.
+    For a generator function, a call is one generator, and its time is the time spent producing its items
+    (in next()), not the time the consumer spends between them.
+
+    >>> @instrumented('square')
+    ... def square(x):
+    ...     return x * x
+    >>> reset(); square(2)
+    4
+    >>> enable(); [square(x) for x in range(3)]; disable()
+    [0, 1, 4]
+    >>> stats()['square']['calls']
+    3
+    """
+    def decorator(func: Callable) -> Callable:
+        name = label or func.__qualname__
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not _state.enabled:
+                    return func(*args, **kwargs)
+                return _instrumented_generator(name, func(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled or _active.get(name):
+                return func(*args, **kwargs)
+            with _measuring(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def section(label: str):
+    """
+    A context manager that records a block of code under a label.
+
+    >>> reset(); enable()
+    >>> with section('block'):
+    ...     total = sum(range(1000))
+    >>> disable(); stats()['block']['calls']
+    1
+    """
+    if not _state.enabled or _active.get(label):
+        return contextlib.nullcontext()
+    return _measuring(label)
+
+
+@contextlib.contextmanager
+def _measuring(label: str):
+    token = _start(label)
+    try:
+        yield
+    finally:
+        _record(label, *_stop(label, token))
+
+
+def _start(label: str):
+    """
+    Start a measurement of a label, and return what _stop needs to end it.
+    """
+    _active[label] = _active.get(label, 0) + 1
+    memory = _state.memory and tracemalloc.is_tracing()
+    if memory:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        _memory_frames.append([current, current])
+    return memory, perf_counter()
+
+
+def _stop(label: str, token):
+    """
+    End a measurement, and return its time in seconds and its peak memory in bytes (None when not traced).
+    """
+    memory, start = token
+    seconds = perf_counter() - start
+    _active[label] -= 1
+    if not memory:
+        return seconds, None
+    start_bytes, nested_peak = _memory_frames.pop()
+    # A nested measurement reset the peak, so the peak of this one is the highest of both
+    peak = max(tracemalloc.get_traced_memory()[1], nested_peak)
+    if _memory_frames:
+        _memory_frames[-1][1] = max(_memory_frames[-1][1], peak)
+    return seconds, peak - start_bytes
+
+
+def _record(label: str, seconds: float, peak_bytes: Optional[int]) -> None:
+    stats = _stats.get(label)
+    if stats is None:
+        stats = _stats[label] = Stats()
+    stats.calls += 1
+    stats.seconds += seconds
+    stats.max_seconds = max(stats.max_seconds, seconds)
+    if peak_bytes is not None:
+        stats.peak_bytes = max(stats.peak_bytes or 0, peak_bytes)
+
+
+def _instrumented_generator(label: str, generator):
+    """
+    Run a generator, recording the time spent in it, and the highest peak of memory while it runs,
+    as a single call of the label when it is exhausted or closed.
+    """
+    seconds, peak_bytes, measured = 0.0, None, False
+    try:
+        while True:
+            if _active.get(label):
+                # Consumed inside another measurement of the same label, which already counts this time
+                item = next(generator, _done)
+            else:
+                token = _start(label)
+                measured = True
+                try:
+                    item = next(generator, _done)
+                finally:
+                    step_seconds, step_peak = _stop(label, token)
+                    seconds += step_seconds
+                    if step_peak is not None:
+                        peak_bytes = max(peak_bytes or 0, step_peak)
+            if item is _done:
+                return
+            yield item
+    finally:
+        if measured:
+            _record(label, seconds, peak_bytes)
+
+
+_done = object()
+
+
+def worker(func: Callable) -> Callable:
+    """
+    Wrap a function for a process pool, so that it returns its result together with the statistics recorded
+    while it ran in the worker (None when recording is off), to be passed to collect().
+    Recording in the worker follows the settings of this process at the time worker() is called.
+
+    >>> reset(); enable()
+    >>> collect(worker(instrumented('double')(lambda x: 2 * x))(21))
+    42
+    >>> disable(); stats()['double']['calls']
+    1
+    """
+    return functools.partial(_call_in_worker, func, _state.enabled, _state.memory)
+
+
+def _call_in_worker(func: Callable, enabled: bool, memory: bool, *args, **kwargs):
+    if not enabled:
+        return func(*args, **kwargs), None
+    if not _state.enabled:
+        # A spawned worker starts with recording off
+        enable(memory)
+    # A forked worker inherits the statistics of its parent, which must not be sent back
+    inherited = dict(_stats)
+    _stats.clear()
+    try:
+        return func(*args, **kwargs), stats()
+    finally:
+        _stats.clear()
+        _stats.update(inherited)
+
+
+def collect(outcome):
+    """
+    Add the statistics of a call made through worker() to the statistics of this process, and return its result.
+    """
+    result, recorded = outcome
+    for label, row in (recorded or {}).items():
+        stats = _stats.get(label)
+        if stats is None:
+            stats = _stats[label] = Stats()
+        stats.calls += row['calls']
+        stats.seconds += row['seconds']
+        stats.max_seconds = max(stats.max_seconds, row['max_seconds'])
+        if row['peak_bytes'] is not None:
+            stats.peak_bytes = max(stats.peak_bytes or 0, row['peak_bytes'])
+    return result
+
+
+def stats() -> Dict[str, dict]:
+    """
+    The recorded statistics, by label: calls, total, mean and maximal seconds, and peak_bytes (None when memory
+    was not traced).
+    """
+    return {label: stats.as_dict() for label, stats in _stats.items()}
+
+
+def dump_json(path: Optional[str] = None) -> str:
+    """
+    Return the recorded statistics as JSON, and write them to a file if a path is given.
+    """
+    text = json.dumps(stats(), indent=1)
+    if path is not None:
+        with open(path, 'w') as file:
+            file.write(text)
+    return text
+
+
+def report() -> None:
+    """
+    Print the recorded statistics as a table, the most expensive label first.
+
+    >>> reset(); report()
+    label                              calls     total (s)   mean (s)    max (s)     peak (MB)
+    """
+    print(f"{'label':<35}{'calls':<10}{'total (s)':<12}{'mean (s)':<12}{'max (s)':<12}peak (MB)")
+    for label, row in sorted(stats().items(), key=lambda item: -item[1]['seconds']):
+        peak = '-' if row['peak_bytes'] is None else f"{row['peak_bytes'] / 2 ** 20:.2f}"
+        print(f"{label:<35}{row['calls']:<10}{row['seconds']:<12.6f}{row['mean_seconds']:<12.6f}"
+              f"{row['max_seconds']:<12.6f}{peak}")
+
+
+def _dump_at_exit() -> None:
+    if not _stats:
+        return
+    output = os.environ.get('INSTRUMENT_OUTPUT')
+    if output:
+        dump_json(output)
+    else:
+        report()
+
+
+if os.environ.get('INSTRUMENT', '') not in ('', '0'):
+    enable(memory=os.environ['INSTRUMENT'] == 'memory')
+    atexit.register(_dump_at_exit)